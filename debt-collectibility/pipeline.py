@@ -7,7 +7,9 @@ from datetime import UTC, datetime
 from typing import Any
 
 from dotenv import load_dotenv
+from src.debtor_graph import DebtorGraphClient
 from src.directus_client import DirectusClient
+from src.local_store import LocalStore
 from src.stages import (
     bankruptcy,
     business_lookup,
@@ -17,7 +19,11 @@ from src.stages import (
     usps,
     verify_contacts,
 )
+from src.utils import journal
+from src.utils.cache import hit_summary
 from src.utils.logger import get_logger
+from src.utils.metrics import snapshot
+from src.utils.quota import QuotaExhausted
 
 
 def _now_iso() -> str:
@@ -28,10 +34,34 @@ def main() -> None:
     load_dotenv()
     log = get_logger()
     batch_limit = int(os.getenv("BATCH_LIMIT", "25"))
-    dx = DirectusClient.from_env()
+    # LOCAL_STORE_PATH runs the batch against an embedded SQLite store; with
+    # LOCAL_STORE_SYNC=0 the run never touches Directus at all.
+    local_store = LocalStore.from_env() if os.getenv("LOCAL_STORE_PATH") else None
+    sync = local_store is None or os.getenv("LOCAL_STORE_SYNC", "1") == "1"
+    remote = DirectusClient.from_env() if sync else None
+    if local_store is not None and remote is not None:
+        local_store.import_from(remote, limit=batch_limit)
+    dx: Any = local_store or remote
 
     debtors = dx.get_debtors_to_enrich(limit=batch_limit)
     log.info(f"Found {len(debtors)} debtors to enrich")
+    # Load every debtor's related rows up front so stages read them from memory.
+    graphs: dict[Any, dict[str, Any]] = {}
+    try:
+        ids = [d.get("id") for d in debtors if d.get("id") is not None]
+        graphs = {g["id"]: g for g in dx.get_debtors_graph(ids)}
+    except Exception as e:
+        log.warning(f"Unable to load debtor graphs, stages will query directly: {e}")
+    try:
+        sent = usps.prefetch(debtors)
+        log.info(f"Prefetched USPS validation for {sent} addresses")
+    except Exception as e:
+        log.warning(f"USPS prefetch failed, addresses will be validated per debtor: {e}")
+    try:
+        sent = skiptrace_apify.prefetch(debtors)
+        log.info(f"Prefetched Apify skip-trace for {sent} names")
+    except Exception as e:
+        log.warning(f"Apify batch prefetch failed, debtors will be traced one by one: {e}")
 
     for debtor in debtors:
         debtor_id = debtor.get("id")
@@ -50,6 +80,7 @@ def main() -> None:
         except Exception as e:
             log.warning(f"Unable to create enrichment_run for debtor {debtor_id}: {e}")
         stage_results: list[dict[str, Any]] = []
+        quota_hit = False
         try:
             dx.update_row("debtors", debtor_id, {"enrichment_status": "running"})
 
@@ -63,10 +94,11 @@ def main() -> None:
                 ("scoring", scoring.run),
             ]
 
+            stage_dx = DebtorGraphClient(dx, graphs[debtor_id]) if debtor_id in graphs else dx
             for stage_name, stage_fn in stages:
                 t0 = time.perf_counter()
                 try:
-                    patch = stage_fn(debtor, dx)
+                    patch = stage_fn(debtor, stage_dx)
                     elapsed = time.perf_counter() - t0
                     if patch:
                         dx.update_row("debtors", debtor_id, patch)
@@ -79,6 +111,21 @@ def main() -> None:
                         }
                     )
                     log.info(f"Debtor {debtor_id} stage={stage_name} seconds={elapsed:.2f}")
+                except QuotaExhausted as qe:
+                    # Skip without retries; the debtor stays "partial" so a later
+                    # batch picks it up once the quota resets.
+                    quota_hit = True
+                    stage_results.append(
+                        {
+                            stage_name: {
+                                "ok": False,
+                                "status": "quota_exhausted",
+                                "seconds": round(time.perf_counter() - t0, 3),
+                                "error": str(qe),
+                            }
+                        }
+                    )
+                    log.warning(f"Debtor {debtor_id} stage={stage_name} quota_exhausted: {qe}")
                 except Exception as se:
                     elapsed = time.perf_counter() - t0
                     stage_results.append(
@@ -96,7 +143,10 @@ def main() -> None:
             dx.update_row(
                 "debtors",
                 debtor_id,
-                {"enrichment_status": "complete", "last_enriched_at": _now_iso()},
+                {
+                    "enrichment_status": "partial" if quota_hit else "complete",
+                    "last_enriched_at": _now_iso(),
+                },
             )
             if run_id:
                 try:
@@ -129,6 +179,14 @@ def main() -> None:
                 except Exception as e2:
                     log.warning(f"Unable to write error to enrichment_run {run_id}: {e2}")
 
+    if local_store is not None and remote is not None:
+        local_store.export_to(remote)
+    log.info(f"Cache hits this batch: {json.dumps(hit_summary())}")
+    # Vendor responses are journaled in the background; make this batch's durable.
+    journal.flush()
+    verify_contacts.record_hit_rate()
+    log.info(f"Batch metrics: {json.dumps(snapshot())}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.utils.rate_limit import TokenBucket, priority_lane
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main() -> None:
+    """Contention micro-benchmark: many batch threads plus a trickle of interactive calls."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=20, help="calls per batch thread")
+    parser.add_argument("--large-every", type=int, default=4, help="every Nth thread asks for --burst tokens")
+    parser.add_argument("--interactive", type=int, default=20)
+    args = parser.parse_args()
+
+    bucket = TokenBucket(args.rate, args.burst)
+    waits: dict[str, list[float]] = {"batch": [], "batch-large": [], "interactive": []}
+    lock = threading.Lock()
+
+    def record(kind: str, waited: float) -> None:
+        with lock:
+            waits[kind].append(waited)
+
+    def batch_worker(i: int) -> None:
+        large = args.large_every and i % args.large_every == 0
+        tokens = args.burst if large else 1
+        for _ in range(args.calls):
+            record("batch-large" if large else "batch", bucket.consume(tokens))
+
+    def interactive_worker() -> None:
+        with priority_lane("interactive"):
+            for _ in range(args.interactive):
+                time.sleep(0.02)
+                record("interactive", bucket.consume())
+
+    threads = [threading.Thread(target=batch_worker, args=(i,)) for i in range(args.threads)]
+    threads.append(threading.Thread(target=interactive_worker))
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+
+    granted = sum(len(v) for v in waits.values())
+    print(f"{granted} grants in {elapsed:.2f}s ({granted / elapsed:.0f}/s, limit {args.rate:.0f} tokens/s)")
+    for kind, values in waits.items():
+        if values:
+            print(
+                f"  {kind:12s} n={len(values):5d}  mean={statistics.mean(values) * 1000:7.1f}ms  "
+                f"p50={_pct(values, 0.5) * 1000:7.1f}ms  p99={_pct(values, 0.99) * 1000:7.1f}ms  "
+                f"max={max(values) * 1000:7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.directus_client import GRAPH_COLLECTIONS, DirectusClient
+
+
+def main() -> None:
+    """Stream debtors and their related collections to JSONL files in bounded memory."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="data/output/export")
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv()
+    dx = DirectusClient.from_env()
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for collection in ["debtors", *GRAPH_COLLECTIONS, "businesses", "scoring_snapshots"]:
+        n = 0
+        with (out_dir / f"{collection}.jsonl").open("w", encoding="utf-8") as fh:
+            for row in dx.iter_related(collection, {}, page_size=args.page_size):
+                fh.write(json.dumps(row) + "\n")
+                n += 1
+        counts[collection] = n
+    print(json.dumps({"exported": counts, "out": str(out_dir)}))
+
+
+if __name__ == "__main__":
+    main()
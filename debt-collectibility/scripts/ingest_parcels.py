@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.parcel_index import PROFILES, ParcelIndex
+
+
+def main() -> None:
+    """Load a county appraisal district parcel export into the local parcel index."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("export", help="CSV or tab-separated parcel export")
+    parser.add_argument("--county", required=True, help="e.g. harris, montgomery")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="generic")
+    parser.add_argument(
+        "--map", action="append", default=[], metavar="FIELD=COLUMN", help="override a profile column"
+    )
+    parser.add_argument("--out", default=os.getenv("PARCEL_INDEX_PATH", "data/parcels.db"))
+    args = parser.parse_args()
+
+    fields = dict(PROFILES[args.profile])
+    for item in args.map:
+        field, _, column = item.partition("=")
+        fields[field] = column
+    # HCAD and most other district exports are tab separated .txt files.
+    delimiter = "\t" if args.export.endswith((".txt", ".tsv")) else ","
+    with open(args.export, newline="", encoding="utf-8-sig", errors="replace") as fh:
+        reader = csv.DictReader(fh, delimiter=delimiter, quoting=csv.QUOTE_MINIMAL)
+        loaded = ParcelIndex(args.out).load(args.county.lower(), reader, fields)
+    print(f"Loaded {loaded} {args.county} parcels into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import re
+import sys
+from collections.abc import Iterator
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.utils.zip_medians import ZipMedianTable
+
+# ACS table B25077 (median value, owner-occupied units) as downloaded from
+# data.census.gov; plain "zip,median_value" CSVs work too.
+ZIP_COLUMNS = ["zip", "zip5", "zcta", "ZCTA5", "NAME", "GEO_ID"]
+VALUE_COLUMNS = ["median_value", "B25077_001E", "value"]
+
+
+def _pick(header: list[str], wanted: list[str], override: str | None) -> str:
+    if override:
+        return override
+    for name in wanted:
+        if name in header:
+            return name
+    raise SystemExit(f"None of {wanted} found in columns {header}; pass it explicitly")
+
+
+def _rows(path: str, zip_col: str | None, value_col: str | None) -> Iterator[tuple[str, int]]:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        header = reader.fieldnames or []
+        zc = _pick(header, ZIP_COLUMNS, zip_col)
+        vc = _pick(header, VALUE_COLUMNS, value_col)
+        for row in reader:
+            # "ZCTA5 77301", "860Z200US77301" or "77301"; ACS label rows don't match.
+            m = re.search(r"(\d{5})$", (row.get(zc) or "").strip())
+            # Top-coded values look like "2,000,000+"; negatives are ACS missing-data codes.
+            raw = (row.get(vc) or "").replace(",", "").rstrip("+").strip()
+            if m and re.fullmatch(r"\d+", raw):
+                yield m.group(1), int(raw)
+
+
+def main() -> None:
+    """Build the memory-mapped ZIP median table used by the property stage."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv", help="ACS ZCTA median home value extract")
+    parser.add_argument("--out", default=os.getenv("ZIP_MEDIANS_PATH", "data/zip_medians.i32"))
+    parser.add_argument("--zip-column")
+    parser.add_argument("--value-column")
+    args = parser.parse_args()
+
+    stored = ZipMedianTable.build(_rows(args.csv, args.zip_column, args.value_column), args.out)
+    print(f"Wrote {stored} ZIP medians to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
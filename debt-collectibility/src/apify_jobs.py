@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from .utils.journal import record_response
+from .utils.rate_limit import acquire
+from .utils.singleflight import normalize_key
+from .utils.sqlite import PathSingleton, ThreadConnections, transaction
+
+APIFY_API = "https://api.apify.com/v2"
+FAILED = ("FAILED", "ABORTED", "TIMED-OUT")
+# A run still recorded as unfinished after this long is assumed done and stale.
+LIVE_SECONDS = 3600
+# A run row left in STARTING this long belongs to a worker that died mid-start.
+START_GRACE_SECONDS = 120
+
+
+class ApifyJobError(RuntimeError):
+    pass
+
+
+class ApifyJobs:
+    """Start actor runs asynchronously, track them in SQLite and fetch each dataset once.
+
+    ``submit`` maps every query key to a run without waiting for it; a key whose
+    run (from any worker sharing the table) is still in flight, or started since
+    the caller's ``since`` timestamp, is not resubmitted. Older finished runs are
+    never reused, so freshness is left to the skip-trace cache. ``collect`` long-polls the run with
+    ``waitForFinish`` and splits its dataset back to the key by the actor's
+    "Input Given" echo.
+    """
+
+    def __init__(self, path: str, token: str, actor: str = "one-api~skip-trace") -> None:
+        self.path = path
+        self.token = token
+        self.actor = actor
+        self.conns = ThreadConnections(path)
+        conn = self.conns.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS apify_runs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, dataset_id TEXT,"
+            " status TEXT NOT NULL, queries INTEGER NOT NULL, started_at REAL NOT NULL,"
+            " items TEXT, error TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS apify_jobs ("
+            " key TEXT PRIMARY KEY, run INTEGER NOT NULL, query TEXT NOT NULL)"
+        )
+
+    def _run_for(self, key: str) -> dict[str, Any] | None:
+        row = self.conns.get().execute(
+            "SELECT r.id, r.run_id, r.dataset_id, r.status, r.queries, r.started_at, r.items, r.error, j.query"
+            " FROM apify_jobs j JOIN apify_runs r ON r.id = j.run WHERE j.key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        names = ("id", "run_id", "dataset_id", "status", "queries", "started_at", "items", "error", "query")
+        return dict(zip(names, row))
+
+    def _reusable(self, run: dict[str, Any] | None, now: float, since: float) -> bool:
+        if run is None or run["status"] in FAILED:
+            return False
+        if run["status"] == "STARTING" and run["run_id"] is None:
+            return now - run["started_at"] < START_GRACE_SECONDS
+        if run["started_at"] >= since:
+            return True
+        return run["items"] is None and run["status"] != "SUCCEEDED" and now - run["started_at"] < LIVE_SECONDS
+
+    def submit(self, jobs: list[tuple[str, str]], max_results: int = 3, since: float | None = None) -> int:
+        """Start one run for every ``(key, query)`` without a reusable run; returns queries sent.
+
+        Finished runs are only joined when they started at or after ``since``
+        (e.g. the start of the current batch); by default only live runs are.
+        """
+        now = time.time()
+        since = now if since is None else since
+
+        def claim(conn: sqlite3.Connection) -> tuple[int | None, list[str]]:
+            fresh = [(k, q) for k, q in jobs if not self._reusable(self._run_for(k), now, since)]
+            if not fresh:
+                return None, []
+            run = conn.execute(
+                "INSERT INTO apify_runs (status, queries, started_at) VALUES ('STARTING', ?, ?)",
+                (len(fresh), now),
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR REPLACE INTO apify_jobs (key, run, query) VALUES (?, ?, ?)",
+                [(k, run, q) for k, q in fresh],
+            )
+            return run, [q for _, q in fresh]
+
+        with transaction(self.conns.get()) as conn:
+            run, queries = claim(conn)
+        if run is None:
+            return 0
+        try:
+            acquire("apify")
+            resp = requests.post(
+                f"{APIFY_API}/acts/{self.actor}/runs",
+                params={"token": self.token},
+                json={"max_results": max_results, "name": queries},
+                timeout=30,
+            )
+            record_response("apify", resp)
+            resp.raise_for_status()
+            data = resp.json()["data"]
+        except Exception as e:
+            self._update(run, status="FAILED", error=str(e))
+            raise ApifyJobError(f"Apify run start failed: {e}") from e
+        self._update(run, run_id=data["id"], dataset_id=data.get("defaultDatasetId"), status=data["status"])
+        return len(queries)
+
+    def abort(self, key: str) -> bool:
+        """Abort ``key``'s run if it is unfinished and traces nobody else; returns whether it did."""
+        run = self._run_for(key)
+        if run is None or run["queries"] != 1 or run["run_id"] is None or run["status"] in (*FAILED, "SUCCEEDED"):
+            return False
+        acquire("apify")
+        resp = requests.post(
+            f"{APIFY_API}/actor-runs/{run['run_id']}/abort", params={"token": self.token}, timeout=30
+        )
+        record_response("apify", resp)
+        resp.raise_for_status()
+        self._update(run["id"], status="ABORTED", error="aborted by caller")
+        return True
+
+    def _update(self, run: int, **fields: Any) -> None:
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self.conns.get().execute(f"UPDATE apify_runs SET {cols} WHERE id = ?", (*fields.values(), run))
+
+    def collect(self, key: str, timeout: float = 300.0) -> list[dict[str, Any]]:
+        """Wait for ``key``'s run to finish and return its dataset rows."""
+        deadline = time.monotonic() + timeout
+        while True:
+            run = self._run_for(key)
+            if run is None:
+                raise ApifyJobError(f"No Apify run submitted for {key}")
+            if run["items"] is not None:
+                return self._demux(json.loads(run["items"]), run)
+            if run["status"] in FAILED:
+                raise ApifyJobError(f"Apify run {run['run_id']} {run['status']}: {run['error'] or ''}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ApifyJobError(f"Apify run {run['run_id']} still {run['status']} after {timeout}s")
+            if run["run_id"] is None:
+                # Another worker is starting this run.
+                if time.time() - run["started_at"] > START_GRACE_SECONDS:
+                    self._update(run["id"], status="FAILED", error="run never started")
+                time.sleep(min(1.0, remaining))
+                continue
+            if run["status"] != "SUCCEEDED":
+                self._poll(run, min(60, max(1, int(remaining))))
+                continue
+            self._fetch(run)
+
+    def _poll(self, run: dict[str, Any], wait: int) -> None:
+        resp = requests.get(
+            f"{APIFY_API}/actor-runs/{run['run_id']}",
+            params={"token": self.token, "waitForFinish": wait},
+            timeout=wait + 30,
+        )
+        record_response("apify", resp)
+        resp.raise_for_status()
+        data = resp.json()["data"]
+        self._update(run["id"], status=data["status"], dataset_id=data.get("defaultDatasetId") or run["dataset_id"])
+
+    def _fetch(self, run: dict[str, Any]) -> None:
+        resp = requests.get(
+            f"{APIFY_API}/datasets/{run['dataset_id']}/items",
+            params={"token": self.token, "format": "json", "clean": "true"},
+            timeout=120,
+        )
+        record_response("apify", resp)
+        resp.raise_for_status()
+        items = resp.json()
+        self.conns.get().execute(
+            "UPDATE apify_runs SET items = ? WHERE id = ? AND items IS NULL",
+            (json.dumps(items if isinstance(items, list) else []), run["id"]),
+        )
+
+    @staticmethod
+    def _demux(items: list[dict[str, Any]], run: dict[str, Any]) -> list[dict[str, Any]]:
+        if run["queries"] == 1 and not any("Input Given" in i for i in items):
+            return items
+        want = normalize_key(run["query"])
+        return [i for i in items if normalize_key(i.get("Input Given")) == want]
+
+
+def _open_jobs(path: str) -> ApifyJobs:
+    token = os.getenv("APIFY_TOKEN")
+    if not token:
+        raise RuntimeError("Missing required environment variable: APIFY_TOKEN")
+    return ApifyJobs(path, token)
+
+
+_jobs: PathSingleton[ApifyJobs] = PathSingleton(_open_jobs)
+
+
+def load_jobs() -> ApifyJobs:
+    """Process-wide job table from ``APIFY_JOBS_DB`` (default ``logs/apify_jobs.db``)."""
+    jobs = _jobs.get(os.getenv("APIFY_JOBS_DB") or str(Path.cwd() / "logs" / "apify_jobs.db"))
+    assert jobs is not None  # _open_jobs raises rather than returning None
+    return jobs
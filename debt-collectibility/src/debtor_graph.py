@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from .directus_client import (
+    GRAPH_COLLECTIONS,
+    UNIQUE_KEYS,
+    is_unique_violation,
+    row_matches,
+    upsert_rows,
+)
+
+
+def _scoped_to(filters: dict[str, Any] | None, debtor_id: Any) -> bool:
+    for key, cond in (filters or {}).items():
+        if key == "debtor_id" and isinstance(cond, dict) and cond.get("_eq") == debtor_id:
+            return True
+        if key == "_and" and any(_scoped_to(sub, debtor_id) for sub in cond or []):
+            return True
+    return False
+
+
+class DebtorGraphClient:
+    """Client wrapper that answers one debtor's related-row reads from its graph.
+
+    Built from a ``get_debtors_graph`` entry. ``list_related`` calls scoped to the
+    debtor (``debtor_id`` equality) or naming a row id already in the graph are
+    served from memory; everything else is delegated to the wrapped client. Writes
+    go through to the wrapped client and are mirrored into the graph, so later
+    stages see the rows earlier stages created, updated or deleted.
+    """
+
+    def __init__(self, dx: Any, graph: dict[str, Any]) -> None:
+        self.dx = dx
+        self.debtor_id = graph.get("id")
+        self.lock = threading.RLock()
+        self.related: dict[str, list[dict[str, Any]]] = {
+            c: [dict(r) for r in graph[c]] for c in GRAPH_COLLECTIONS if isinstance(graph.get(c), list)
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.dx, name)
+
+    def _mirror(self, collection: str, row: dict[str, Any] | None) -> None:
+        rows = self.related.get(collection)
+        if rows is None or not row or row.get("debtor_id") != self.debtor_id:
+            return
+        for i, existing in enumerate(rows):
+            if existing.get("id") == row.get("id"):
+                rows[i] = {**existing, **row}
+                return
+        rows.append(dict(row))
+
+    def list_related(
+        self, collection: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        with self.lock:
+            rows = self.related.get(collection)
+            if rows is not None:
+                id_cond = (filters or {}).get("id")
+                by_id = isinstance(id_cond, dict) and any(
+                    r.get("id") == id_cond.get("_eq") for r in rows
+                )
+                if by_id or _scoped_to(filters, self.debtor_id):
+                    out = [dict(r) for r in rows if row_matches(r, filters)]
+                    return out if limit is None or limit < 0 else out[:limit]
+        return self.dx.list_related(collection, filters, limit=limit)
+
+    def create_row(self, collection: str, data: dict[str, Any]) -> dict[str, Any]:
+        row = self.dx.create_row(collection, data)
+        with self.lock:
+            self._mirror(collection, row)
+        return row
+
+    def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        created = self.dx.create_rows(collection, rows)
+        with self.lock:
+            for row in created:
+                self._mirror(collection, row)
+        return created
+
+    def update_row(self, collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
+        row = self.dx.update_row(collection, id, data)
+        with self.lock:
+            for existing in self.related.get(collection, []):
+                if existing.get("id") == id:
+                    existing.update(data)
+                    if row:
+                        existing.update(row)
+        return row
+
+    def delete_row(self, collection: str, id_or_filter: Any) -> None:
+        self.dx.delete_row(collection, id_or_filter)
+        with self.lock:
+            rows = self.related.get(collection)
+            if rows is None:
+                return
+            if isinstance(id_or_filter, dict):
+                rows[:] = [r for r in rows if not row_matches(r, id_or_filter)]
+            else:
+                rows[:] = [r for r in rows if r.get("id") != id_or_filter]
+
+    def upsert(
+        self,
+        collection: str,
+        key_fields: list[str],
+        row: dict[str, Any],
+        update: bool = True,
+    ) -> dict[str, Any]:
+        return self.upsert_many(collection, key_fields, [row], update=update)[0]
+
+    def upsert_many(
+        self,
+        collection: str,
+        key_fields: list[str],
+        rows: list[dict[str, Any]],
+        update: bool = True,
+    ) -> list[dict[str, Any]]:
+        # Existence checks for this debtor's rows are answered from the graph; a
+        # unique-constraint conflict means the graph is stale, so defer to the client.
+        if collection not in self.related or not all(
+            r.get("debtor_id") == self.debtor_id for r in rows
+        ):
+            return self.dx.upsert_many(collection, key_fields, rows, update=update)
+        try:
+            return upsert_rows(self, collection, key_fields, rows, update=update)
+        except Exception as e:
+            if UNIQUE_KEYS.get(collection) != tuple(key_fields) or not is_unique_violation(e):
+                raise
+        result = self.dx.upsert_many(collection, key_fields, rows, update=update)
+        with self.lock:
+            for row in result:
+                self._mirror(collection, row)
+        return result
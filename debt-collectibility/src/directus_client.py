@@ -2,13 +2,18 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+import threading
+from collections.abc import Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from typing import Any
 
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential_jitter
 
+from .utils.json_stream import iter_json_array
 from .utils.logger import get_logger
+from .utils.singleflight import SingleFlight
 
 
 class DirectusError(Exception):
@@ -31,11 +36,127 @@ def _should_retry(exc: Exception) -> bool:
     return False
 
 
+# Debtor-scoped collections returned by get_debtors_graph, keyed by their O2M alias.
+GRAPH_COLLECTIONS = [
+    "addresses",
+    "phones",
+    "emails",
+    "bankruptcy_cases",
+    "properties",
+    "debtor_businesses",
+]
+
+# Natural keys backed by unique constraints in the Directus schema. Upserts on
+# these insert first and only read back when the database reports a conflict.
+UNIQUE_KEYS: dict[str, tuple[str, ...]] = {
+    "phones": ("debtor_id", "phone_e164"),
+    "emails": ("debtor_id", "email"),
+    "debtor_businesses": ("debtor_id", "business_id"),
+}
+
+# Striped in-process locks so concurrent upserts of the same natural key cannot
+# both miss the lookup and insert duplicates.
+_UPSERT_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _natural_key(row: dict[str, Any], key_fields: list[str]) -> tuple[str, ...]:
+    return tuple(str(row.get(f)) for f in key_fields)
+
+
+def _key_filter(key_fields: list[str], rows: list[dict[str, Any]]) -> dict[str, Any]:
+    clauses = []
+    for f in key_fields:
+        values = list({str(r.get(f)): r.get(f) for r in rows}.values())
+        if len(values) == 1:
+            clauses.append({f: {"_eq": values[0]}})
+        else:
+            clauses.append({f: {"_in": values}})
+    return {"_and": clauses}
+
+
+def is_unique_violation(exc: Exception) -> bool:
+    return "RECORD_NOT_UNIQUE" in str(exc)
+
+
+def row_matches(row: dict[str, Any], filters: dict[str, Any] | None) -> bool:
+    """Evaluate the ``_eq``/``_in``/``_and`` filter subset against an in-memory row."""
+    for key, cond in (filters or {}).items():
+        if key == "_and":
+            if not all(row_matches(row, sub) for sub in cond or []):
+                return False
+            continue
+        if not isinstance(cond, dict):
+            raise DirectusError(f"Unsupported filter for {key}: {cond!r}")
+        for op, value in cond.items():
+            if op == "_eq":
+                if row.get(key) != value:
+                    return False
+            elif op == "_in":
+                if row.get(key) not in (value or []):
+                    return False
+            else:
+                raise DirectusError(f"Unsupported filter operator: {op}")
+    return True
+
+
+def upsert_rows(
+    store: Any,
+    collection: str,
+    key_fields: list[str],
+    rows: list[dict[str, Any]],
+    update: bool = True,
+) -> list[dict[str, Any]]:
+    """Find-or-create ``rows`` by natural key with one read and one bulk insert.
+
+    Works against anything exposing ``list_related``/``create_rows``/``update_row``.
+    Existing rows are patched with changed fields when ``update`` is true and left
+    untouched otherwise. Results are returned in input order.
+    """
+    if not rows:
+        return []
+    wanted: dict[tuple[str, ...], dict[str, Any]] = {}
+    for row in rows:
+        key = _natural_key(row, key_fields)
+        wanted[key] = {**wanted.get(key, {}), **row}
+    existing: dict[tuple[str, ...], dict[str, Any]] = {}
+    found = store.list_related(collection, _key_filter(key_fields, list(wanted.values())), limit=-1)
+    for r in found:
+        existing.setdefault(_natural_key(r, key_fields), r)
+
+    out: dict[tuple[str, ...], dict[str, Any]] = {}
+    missing = [(k, row) for k, row in wanted.items() if k not in existing]
+    if missing:
+        created = store.create_rows(collection, [row for _, row in missing])
+        for (key, _), row in zip(missing, created, strict=True):
+            out[key] = row
+    for key, current in existing.items():
+        if key not in wanted:
+            continue
+        if update:
+            changes = {f: v for f, v in wanted[key].items() if current.get(f) != v}
+            if changes:
+                current = store.update_row(collection, current["id"], changes) or {
+                    **current,
+                    **changes,
+                }
+        out[key] = current
+    return [out[_natural_key(r, key_fields)] for r in rows]
+
+
+def _order_by_ids(rows: list[dict[str, Any]], ids: list[Any]) -> list[dict[str, Any]]:
+    by_id = {r.get("id"): r for r in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
 @dataclass
 class DirectusClient:
     base_url: str
     token: str
     session: requests.Session
+    # None until the first graph read tells us whether O2M aliases exist on debtors.
+    _nested_graph: bool | None = field(default=None, repr=False)
+    # Identical concurrent GETs share one request; each caller parses the body itself.
+    _reads: SingleFlight = field(default_factory=SingleFlight, repr=False)
 
     @classmethod
     def from_env(cls) -> DirectusClient:
@@ -77,6 +198,10 @@ class DirectusClient:
             raise DirectusError(msg) from e
         return resp
 
+    def _get(self, url: str, params: dict[str, Any]) -> requests.Response:
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        return self._reads.do(key, lambda: self._request("GET", url, params=params))
+
     def get_debtors_to_enrich(self, limit: int) -> list[dict[str, Any]]:
         url = self._items_url("debtors")
         # Filter enrichment_status in ['pending','partial']
@@ -84,15 +209,95 @@ class DirectusClient:
             "filter": json.dumps({"enrichment_status": {"_in": ["pending", "partial"]}}),
             "limit": limit,
         }
-        resp = self._request("GET", url, params=params)
+        resp = self._get(url, params)
         payload = resp.json()
         return payload.get("data", [])
 
+    def iter_debtors_to_enrich(self, page_size: int = 500) -> Iterator[dict[str, Any]]:
+        return self.iter_related(
+            "debtors", {"enrichment_status": {"_in": ["pending", "partial"]}}, page_size=page_size
+        )
+
+    def iter_related(
+        self, collection: str, filters: dict[str, Any], page_size: int = 500
+    ) -> Iterator[dict[str, Any]]:
+        """Yield every matching row without buffering whole responses.
+
+        Pages are walked by ``id`` (keyset, so rows changing under the filter do
+        not shift later pages) and each page's ``data`` array is decoded
+        incrementally from the socket, one row at a time.
+        """
+        url = self._items_url(collection)
+        last_id: Any = None
+        while True:
+            page_filter = filters
+            if last_id is not None:
+                page_filter = {"_and": [filters or {}, {"id": {"_gt": last_id}}]}
+            params = {"filter": json.dumps(page_filter), "limit": page_size, "sort": "id"}
+            resp = self._request("GET", url, params=params, stream=True)
+            count = 0
+            try:
+                for row in iter_json_array(resp.iter_content(chunk_size=64 * 1024)):
+                    count += 1
+                    last_id = row.get("id")
+                    yield row
+            finally:
+                resp.close()
+            if count < page_size or last_id is None:
+                return
+
+    def get_debtor_graph(self, debtor_id: Any) -> dict[str, Any] | None:
+        graphs = self.get_debtors_graph([debtor_id])
+        return graphs[0] if graphs else None
+
+    def get_debtors_graph(self, ids: list[Any]) -> list[dict[str, Any]]:
+        """Return debtors with every ``GRAPH_COLLECTIONS`` list nested under its name.
+
+        Uses one relational ``fields``/``deep`` request when the debtors collection
+        exposes O2M alias fields named after the related collections. If Directus
+        rejects those fields, falls back to one ``_in`` query per collection for
+        the whole id set (still independent of the number of debtors).
+        """
+        if not ids:
+            return []
+        url = self._items_url("debtors")
+        if self._nested_graph is not False:
+            params = {
+                "filter": json.dumps({"id": {"_in": ids}}),
+                "fields": ",".join(["*", *(f"{c}.*" for c in GRAPH_COLLECTIONS)]),
+                "deep": json.dumps({c: {"_limit": -1} for c in GRAPH_COLLECTIONS}),
+                "limit": -1,
+            }
+            try:
+                debtors = self._get(url, params).json().get("data", [])
+                self._nested_graph = True
+                return _order_by_ids(debtors, ids)
+            except DirectusError as e:
+                if self._nested_graph:
+                    raise
+                get_logger().info(f"Nested debtor graph unavailable, using per-collection reads: {e}")
+                self._nested_graph = False
+        debtors = self.list_related("debtors", {"id": {"_in": ids}}, limit=-1)
+        by_id = {d["id"]: {**d, **{c: [] for c in GRAPH_COLLECTIONS}} for d in debtors}
+        for collection in GRAPH_COLLECTIONS:
+            for row in self.list_related(collection, {"debtor_id": {"_in": ids}}, limit=-1):
+                if row.get("debtor_id") in by_id:
+                    by_id[row["debtor_id"]][collection].append(row)
+        return _order_by_ids(list(by_id.values()), ids)
+
     def create_row(self, collection: str, data: dict[str, Any]) -> dict[str, Any]:
         url = self._items_url(collection)
         resp = self._request("POST", url, json=data)
         return resp.json().get("data")
 
+    def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Bulk insert; Directus returns the created items in request order."""
+        if not rows:
+            return []
+        url = self._items_url(collection)
+        resp = self._request("POST", url, json=rows)
+        return resp.json().get("data") or []
+
     def update_row(self, collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
         url = f"{self._items_url(collection)}/{id}"
         resp = self._request("PATCH", url, json=data)
@@ -106,9 +311,48 @@ class DirectusClient:
             "filter": json.dumps(filters),
             "limit": limit,
         }
-        resp = self._request("GET", url, params=params)
+        resp = self._get(url, params)
         return resp.json().get("data", [])
 
+    def upsert(
+        self,
+        collection: str,
+        key_fields: list[str],
+        row: dict[str, Any],
+        update: bool = True,
+    ) -> dict[str, Any]:
+        return self.upsert_many(collection, key_fields, [row], update=update)[0]
+
+    def upsert_many(
+        self,
+        collection: str,
+        key_fields: list[str],
+        rows: list[dict[str, Any]],
+        update: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Insert-or-update rows identified by ``key_fields``.
+
+        When the key is enforced by a unique constraint (see ``UNIQUE_KEYS``) the
+        rows are inserted optimistically in one request and only looked up if
+        Directus reports a conflict; otherwise existing rows are read first.
+        """
+        if not rows:
+            return []
+        stripes = sorted(
+            {hash((collection, _natural_key(r, key_fields))) % len(_UPSERT_LOCKS) for r in rows}
+        )
+        with ExitStack() as stack:
+            for i in stripes:
+                stack.enter_context(_UPSERT_LOCKS[i])
+            keys = [_natural_key(r, key_fields) for r in rows]
+            if UNIQUE_KEYS.get(collection) == tuple(key_fields) and len(set(keys)) == len(keys):
+                try:
+                    return self.create_rows(collection, rows)
+                except DirectusError as e:
+                    if not is_unique_violation(e):
+                        raise
+            return upsert_rows(self, collection, key_fields, rows, update=update)
+
     def delete_row(self, collection: str, id_or_filter: Any) -> None:
         """Delete a single row by id, or multiple rows by filter."""
         if isinstance(id_or_filter, dict):
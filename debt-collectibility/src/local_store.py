@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+from .directus_client import GRAPH_COLLECTIONS, UNIQUE_KEYS, upsert_rows
+from .utils.logger import get_logger
+
+# Fields that get an expression index so debtor-scoped lookups stay O(log n).
+INDEXED_FIELDS = ["debtor_id", "phone_e164", "email", "name", "enrichment_status"]
+
+# Natural keys export dedupes on. ``import_from`` only pulls businesses already
+# linked to the batch, so a business found by name may exist upstream already.
+EXPORT_KEYS: dict[str, tuple[str, ...]] = {**UNIQUE_KEYS, "businesses": ("name",)}
+
+
+class LocalStoreError(Exception):
+    pass
+
+
+def _is_fk(field: str) -> bool:
+    return field == "id" or field.endswith("_id")
+
+
+def _json_path(field: str) -> str:
+    if not field.replace("_", "").isalnum():
+        raise LocalStoreError(f"Unsupported field name in filter: {field}")
+    return f"$.{field}"
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _compile_filter(filters: dict[str, Any] | None) -> tuple[str, list[Any]]:
+    """Translate the Directus filter subset used by the stages into SQL.
+
+    Supports ``{"field": {"_eq": v}}``, ``{"field": {"_in": [...]}}``, ``{"_and": [...]}``
+    and implicit AND across top-level keys.
+    """
+    clauses: list[str] = []
+    params: list[Any] = []
+    for key, cond in (filters or {}).items():
+        if key == "_and":
+            for sub in cond or []:
+                sql, sub_params = _compile_filter(sub)
+                clauses.append(f"({sql})")
+                params.extend(sub_params)
+            continue
+        if not isinstance(cond, dict):
+            raise LocalStoreError(f"Unsupported filter for {key}: {cond!r}")
+        column = "id" if key == "id" else f"json_extract(data, '{_json_path(key)}')"
+        for op, value in cond.items():
+            if op == "_eq":
+                if value is None:
+                    clauses.append(f"{column} IS NULL")
+                else:
+                    clauses.append(f"{column} = ?")
+                    params.append(_sql_value(value))
+            elif op == "_in":
+                values = list(value or [])
+                if not values:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(_sql_value(v) for v in values)
+            else:
+                raise LocalStoreError(f"Unsupported filter operator: {op}")
+    return (" AND ".join(clauses) or "1"), params
+
+
+class LocalStore:
+    """Directus-compatible row store backed by SQLite.
+
+    Implements the subset of ``DirectusClient`` the pipeline uses so stages can run
+    against it unchanged. Rows created locally get negative ids; every write is
+    journaled so ``export_to`` can replay the batch against Directus in bulk.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " collection TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, id))"
+        )
+        for field in INDEXED_FIELDS:
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_rows_{field} "
+                f"ON rows (collection, json_extract(data, '{_json_path(field)}'))"
+            )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL,"
+            " collection TEXT NOT NULL, id INTEGER NOT NULL, data TEXT)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Remote ids of local rows already exported, so an interrupted export resumes.
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS exported (local_id INTEGER PRIMARY KEY, remote_id TEXT NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls) -> LocalStore:
+        return cls(os.getenv("LOCAL_STORE_PATH") or ":memory:")
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def _next_local_id(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_local_id'").fetchone()
+        value = int(row[0]) if row else 1
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_local_id', ?)", (str(value + 1),)
+        )
+        return -value
+
+    def _log(self, op: str, collection: str, id: Any, data: dict[str, Any] | None) -> None:
+        self.conn.execute(
+            "INSERT INTO changes (op, collection, id, data) VALUES (?, ?, ?, ?)",
+            (op, collection, id, json.dumps(data) if data is not None else None),
+        )
+
+    def _put(self, collection: str, row: dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rows (collection, id, data) VALUES (?, ?, ?)",
+            (collection, row["id"], json.dumps(row)),
+        )
+
+    # --- DirectusClient surface -------------------------------------------------
+
+    def get_debtors_to_enrich(self, limit: int) -> list[dict[str, Any]]:
+        return self.list_related(
+            "debtors", {"enrichment_status": {"_in": ["pending", "partial"]}}, limit=limit
+        )
+
+    def get_debtor_graph(self, debtor_id: Any) -> dict[str, Any] | None:
+        graphs = self.get_debtors_graph([debtor_id])
+        return graphs[0] if graphs else None
+
+    def get_debtors_graph(self, ids: list[Any]) -> list[dict[str, Any]]:
+        with self.lock:
+            debtors = {d["id"]: d for d in self.list_related("debtors", {"id": {"_in": ids}}, limit=-1)}
+            for collection in GRAPH_COLLECTIONS:
+                for d in debtors.values():
+                    d[collection] = []
+                for row in self.list_related(collection, {"debtor_id": {"_in": ids}}, limit=-1):
+                    if row.get("debtor_id") in debtors:
+                        debtors[row["debtor_id"]][collection].append(row)
+        return [debtors[i] for i in ids if i in debtors]
+
+    def create_row(self, collection: str, data: dict[str, Any]) -> dict[str, Any]:
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                row = {**data, "id": self._next_local_id()}
+                self._put(collection, row)
+                self._log("create", collection, row["id"], None)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return dict(row)
+
+    def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self.create_row(collection, r) for r in rows]
+
+    def update_row(self, collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
+        with self.lock:
+            found = self.conn.execute(
+                "SELECT data FROM rows WHERE collection = ? AND id = ?", (collection, id)
+            ).fetchone()
+            if not found:
+                raise LocalStoreError(f"{collection}/{id} not found")
+            row = {**json.loads(found[0]), **data, "id": id}
+            self.conn.execute("BEGIN")
+            try:
+                self._put(collection, row)
+                self._log("update", collection, id, data)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return dict(row)
+
+    def list_related(
+        self, collection: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        where, params = _compile_filter(filters)
+        sql = f"SELECT data FROM rows WHERE collection = ? AND {where} ORDER BY id < 0, abs(id)"
+        if limit is not None and limit >= 0:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            cur = self.conn.execute(sql, [collection, *params])
+            return [json.loads(r[0]) for r in cur.fetchall()]
+
+    def upsert(
+        self,
+        collection: str,
+        key_fields: list[str],
+        row: dict[str, Any],
+        update: bool = True,
+    ) -> dict[str, Any]:
+        return self.upsert_many(collection, key_fields, [row], update=update)[0]
+
+    def upsert_many(
+        self,
+        collection: str,
+        key_fields: list[str],
+        rows: list[dict[str, Any]],
+        update: bool = True,
+    ) -> list[dict[str, Any]]:
+        with self.lock:
+            return upsert_rows(self, collection, key_fields, rows, update=update)
+
+    def delete_row(self, collection: str, id_or_filter: Any) -> None:
+        with self.lock:
+            if isinstance(id_or_filter, dict):
+                ids = [r["id"] for r in self.list_related(collection, id_or_filter, limit=-1)]
+            else:
+                ids = [id_or_filter]
+            self.conn.execute("BEGIN")
+            try:
+                for id in ids:
+                    self.conn.execute(
+                        "DELETE FROM rows WHERE collection = ? AND id = ?", (collection, id)
+                    )
+                    self._log("delete", collection, id, None)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # --- Bulk sync with Directus --------------------------------------------------
+
+    def load_rows(self, collection: str, rows: list[dict[str, Any]]) -> int:
+        """Insert rows that already exist upstream (keeps their ids, not journaled)."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for row in rows:
+                    if row.get("id") is None:
+                        raise LocalStoreError(f"Cannot load {collection} row without id")
+                    self._put(collection, row)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    @staticmethod
+    def _fetch(
+        dx: Any, collection: str, filters: dict[str, Any], batch: int = 1000
+    ) -> Iterator[list[dict[str, Any]]]:
+        # Prefer the streaming reader so wide raw_payload pages never sit in memory whole.
+        if not hasattr(dx, "iter_related"):
+            yield dx.list_related(collection, filters, limit=-1)
+            return
+        rows: list[dict[str, Any]] = []
+        for row in dx.iter_related(collection, filters):
+            rows.append(row)
+            if len(rows) >= batch:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def import_from(self, dx: Any, limit: int, chunk_size: int = 100) -> list[int]:
+        """Pull pending debtors and all their related rows from Directus."""
+        log = get_logger()
+        debtors = dx.get_debtors_to_enrich(limit=limit)
+        self.load_rows("debtors", debtors)
+        ids = [d["id"] for d in debtors if d.get("id") is not None]
+        business_ids: set[Any] = set()
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i : i + chunk_size]
+            for collection in GRAPH_COLLECTIONS:
+                for rows in self._fetch(dx, collection, {"debtor_id": {"_in": chunk}}):
+                    self.load_rows(collection, rows)
+                    if collection == "debtor_businesses":
+                        business_ids.update(r["business_id"] for r in rows if r.get("business_id"))
+        biz = sorted(business_ids)
+        for i in range(0, len(biz), chunk_size):
+            for rows in self._fetch(dx, "businesses", {"id": {"_in": biz[i : i + chunk_size]}}):
+                self.load_rows("businesses", rows)
+        log.info(f"Imported {len(ids)} debtors into local store {self.path}")
+        return ids
+
+    def pending_changes(self) -> int:
+        with self.lock:
+            return int(self.conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0])
+
+    def _local_refs(self, row: dict[str, Any]) -> list[tuple[str, int]]:
+        return [
+            (k, v)
+            for k, v in row.items()
+            if k != "id" and _is_fk(k) and isinstance(v, int) and not isinstance(v, bool) and v < 0
+        ]
+
+    def _commit_export(
+        self, changes: list[tuple[str, str, int]], remaps: list[tuple[int, Any]] | None = None
+    ) -> None:
+        """Record remote ids and drop the journal entries a Directus write just covered."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO exported (local_id, remote_id) VALUES (?, ?)",
+                    [(local, json.dumps(remote)) for local, remote in remaps or []],
+                )
+                self.conn.executemany(
+                    "DELETE FROM changes WHERE op = ? AND collection = ? AND id = ?", changes
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def export_to(self, dx: Any, chunk_size: int = 500) -> dict[str, int]:
+        """Replay journaled writes against Directus in bulk.
+
+        Local rows are created in dependency rounds: a row is sent once every
+        ``*_id`` reference it holds to another local row has been rewritten to the
+        id Directus assigned, so parents (``businesses``, ``addresses``) always go
+        before the rows pointing at them. Collections in ``EXPORT_KEYS`` are
+        upserted on their natural key so rows that already exist upstream are
+        reused rather than duplicated. Updates to upstream rows are merged into
+        a single PATCH per row. Remote ids and journal removals are committed after
+        every Directus write, so a failed export can simply be run again.
+        """
+        log = get_logger()
+        with self.lock:
+            changes = self.conn.execute(
+                "SELECT op, collection, id, data FROM changes ORDER BY seq"
+            ).fetchall()
+            local_ids: dict[int, Any] = {
+                local: json.loads(remote)
+                for local, remote in self.conn.execute("SELECT local_id, remote_id FROM exported")
+            }
+            create_order: list[tuple[str, int]] = []
+            deleted: set[tuple[str, int]] = set()
+            patches: dict[tuple[str, int], dict[str, Any]] = {}
+            for op, collection, id, data in changes:
+                key = (collection, id)
+                if op == "create":
+                    create_order.append(key)
+                elif op == "update" and id >= 0:
+                    patches.setdefault(key, {}).update(json.loads(data))
+                elif op == "delete":
+                    deleted.add(key)
+                    patches.pop(key, None)
+            pending: list[tuple[str, dict[str, Any]]] = []
+            for collection, id in create_order:
+                if (collection, id) in deleted:
+                    continue
+                found = self.conn.execute(
+                    "SELECT data FROM rows WHERE collection = ? AND id = ?", (collection, id)
+                ).fetchone()
+                if found:
+                    pending.append((collection, json.loads(found[0])))
+
+        def remap(row: dict[str, Any]) -> dict[str, Any]:
+            out: dict[str, Any] = {}
+            for k, v in row.items():
+                if k == "id":
+                    continue
+                if _is_fk(k) and isinstance(v, int) and not isinstance(v, bool) and v < 0:
+                    if v not in local_ids:
+                        raise LocalStoreError(f"Unresolved local reference {k}={v}")
+                    v = local_ids[v]
+                out[k] = v
+            return out
+
+        stats = {"created": 0, "updated": 0, "deleted": 0}
+        while pending:
+            ready: dict[str, list[dict[str, Any]]] = {}
+            waiting: list[tuple[str, dict[str, Any]]] = []
+            for collection, row in pending:
+                if all(v in local_ids for _, v in self._local_refs(row)):
+                    ready.setdefault(collection, []).append(row)
+                else:
+                    waiting.append((collection, row))
+            if not ready:
+                collection, row = waiting[0]
+                k, v = next((k, v) for k, v in self._local_refs(row) if v not in local_ids)
+                raise LocalStoreError(f"Unresolved local reference {k}={v} in {collection}/{row['id']}")
+            for collection, rows in ready.items():
+                for i in range(0, len(rows), chunk_size):
+                    chunk = rows[i : i + chunk_size]
+                    rows_out = [remap(r) for r in chunk]
+                    key = EXPORT_KEYS.get(collection)
+                    if key:
+                        created = dx.upsert_many(collection, list(key), rows_out, update=False)
+                    else:
+                        created = dx.create_rows(collection, rows_out)
+                    remaps = [
+                        (local["id"], remote.get("id")) for local, remote in zip(chunk, created, strict=True)
+                    ]
+                    self._commit_export([("create", collection, r["id"]) for r in chunk], remaps)
+                    local_ids.update(remaps)
+                    stats["created"] += len(chunk)
+            pending = waiting
+        for (collection, id), patch in patches.items():
+            if (collection, id) in deleted:
+                continue
+            dx.update_row(collection, id, remap(patch))
+            self._commit_export([("update", collection, id)])
+            stats["updated"] += 1
+        for collection, id in sorted(deleted):
+            if id >= 0:
+                dx.delete_row(collection, id)
+                self._commit_export([("delete", collection, id)])
+                stats["deleted"] += 1
+        with self.lock:
+            # What is left only touched rows that never reached Directus. ``exported``
+            # is kept so later batches can still point at rows created by this one.
+            self.conn.execute("DELETE FROM changes")
+        log.info(f"Exported local store {self.path} to Directus: {stats}")
+        return stats
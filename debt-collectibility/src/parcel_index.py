@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .utils.normalize import normalize_address
+from .utils.sqlite import PathSingleton, ThreadConnections, transaction
+
+# Column names per appraisal district export. "generic" is the documented CSV
+# layout for districts without a dedicated profile; --map overrides any field.
+PROFILES: dict[str, dict[str, str]] = {
+    "generic": {
+        "account": "account",
+        "situs_address": "situs_address",
+        "situs_city": "situs_city",
+        "situs_zip": "situs_zip",
+        "owner_name": "owner_name",
+        "owner_address": "owner_address",
+        "market_value": "market_value",
+        "assessed_value": "assessed_value",
+        "annual_tax": "annual_tax",
+        "homestead": "homestead",
+    },
+    # Harris County Appraisal District real_acct.txt (tab separated).
+    "hcad": {
+        "account": "acct",
+        "situs_address": "site_addr_1",
+        "situs_city": "site_addr_2",
+        "situs_zip": "site_addr_3",
+        "owner_name": "mailto",
+        "owner_address": "mail_addr_1",
+        "market_value": "tot_mkt_val",
+        "assessed_value": "tot_appr_val",
+    },
+}
+
+_COLUMNS = (
+    "county, account, situs_key, owner_key, line1, city, zip, owner_name,"
+    " market_value, assessed_value, annual_tax, owner_occupied, raw"
+)
+
+
+def situs_key(line1: str | None, zip5: str | None) -> str:
+    """Normalized street line plus ZIP5; city spellings vary too much between sources."""
+    addr = normalize_address(line1 or "", None, "", "", zip5 or "")
+    return f"{addr['line1']}|{addr['zip']}" if addr["line1"] else ""
+
+
+def owner_key(name: str | None) -> str:
+    return " ".join(re.sub(r"[^A-Z0-9&]+", " ", (name or "").upper().replace("&", " & ")).split())
+
+
+def _money(value: Any) -> float | None:
+    try:
+        amount = float(str(value).replace(",", "").replace("$", "").strip())
+    except ValueError:
+        return None
+    return amount if amount > 0 else None
+
+
+def _flag(value: Any) -> bool:
+    return str(value or "").strip().upper() in ("Y", "YES", "TRUE", "1", "HS")
+
+
+def _row_factory(conn: sqlite3.Connection) -> None:
+    conn.row_factory = sqlite3.Row
+
+
+class ParcelIndex:
+    """County appraisal parcels in SQLite, indexed by situs address and owner name.
+
+    Built offline by ``scripts/ingest_parcels.py`` and read by the property stage
+    ahead of ATTOM. Owner names are stored the way appraisal rolls write them
+    (``LAST FIRST ...``), so owner lookups are index range scans on that prefix.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conns = ThreadConnections(path, setup=_row_factory)
+        conn = self.conns.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS parcels ("
+            " county TEXT NOT NULL, account TEXT NOT NULL, situs_key TEXT NOT NULL,"
+            " owner_key TEXT NOT NULL, line1 TEXT, city TEXT, zip TEXT, owner_name TEXT,"
+            " market_value REAL, assessed_value REAL, annual_tax REAL, owner_occupied INTEGER,"
+            " raw TEXT, PRIMARY KEY (county, account))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS parcels_situs ON parcels (situs_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS parcels_owner ON parcels (owner_key, zip)")
+
+    def load(self, county: str, rows: Iterable[dict[str, Any]], fields: dict[str, str]) -> int:
+        """Replace ``county``'s parcels with ``rows`` mapped through ``fields``."""
+        def get(row: dict[str, Any], field: str) -> Any:
+            column = fields.get(field)
+            return row.get(column) if column else None
+
+        def records() -> Iterable[tuple[Any, ...]]:
+            for row in rows:
+                line1 = (get(row, "situs_address") or "").strip()
+                zip5 = re.sub(r"\D", "", str(get(row, "situs_zip") or ""))[:5]
+                key = situs_key(line1, zip5)
+                if not key:
+                    continue
+                owner_addr = (get(row, "owner_address") or "").strip()
+                occupied = _flag(get(row, "homestead")) or (
+                    bool(owner_addr) and situs_key(owner_addr, zip5) == key
+                )
+                yield (
+                    county,
+                    str(get(row, "account") or key),
+                    key,
+                    owner_key(get(row, "owner_name")),
+                    normalize_address(line1, None, "", "", "")["line1"],
+                    (get(row, "situs_city") or "").strip().upper() or None,
+                    zip5,
+                    (get(row, "owner_name") or "").strip() or None,
+                    _money(get(row, "market_value")),
+                    _money(get(row, "assessed_value")),
+                    _money(get(row, "annual_tax")),
+                    int(occupied),
+                    json.dumps(row),
+                )
+
+        with transaction(self.conns.get()) as conn:
+            conn.execute("DELETE FROM parcels WHERE county = ?", (county,))
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR REPLACE INTO parcels ({_COLUMNS}) VALUES ({', '.join('?' * 13)})",
+                records(),
+            )
+            return conn.total_changes - before
+
+    def by_address(self, line1: str | None, zip5: str | None) -> dict[str, Any] | None:
+        key = situs_key(line1, zip5)
+        if not key:
+            return None
+        row = self.conns.get().execute(
+            f"SELECT {_COLUMNS} FROM parcels WHERE situs_key = ? LIMIT 1", (key,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def by_owner(self, first: str | None, last: str | None, zip5: str | None) -> list[dict[str, Any]]:
+        """Parcels in ``zip5`` whose owner reads ``LAST FIRST...``."""
+        prefix = owner_key(f"{last or ''} {first or ''}")
+        if not prefix or " " not in prefix or not zip5:
+            return []
+        rows = self.conns.get().execute(
+            f"SELECT {_COLUMNS} FROM parcels"
+            " WHERE (owner_key = ? OR (owner_key >= ? AND owner_key < ?)) AND zip = ?",
+            # Whole-word prefix: "GARRETT KEVIN" matches "GARRETT KEVIN & JANE", not "GARRETT KEVINA".
+            (prefix, prefix + " ", prefix + "!", zip5[:5]),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+_index: PathSingleton[ParcelIndex] = PathSingleton(
+    lambda path: ParcelIndex(path) if os.path.exists(path) else None
+)
+
+
+def load_index() -> ParcelIndex | None:
+    """Process-wide index from ``PARCEL_INDEX_PATH`` (default ``data/parcels.db``), if built."""
+    return _index.get(os.getenv("PARCEL_INDEX_PATH") or str(Path.cwd() / "data" / "parcels.db"))
@@ -7,10 +7,29 @@ from typing import Any
 
 import requests
 
+from src.utils.cache import cached
+from src.utils.journal import record_response
 from src.utils.logger import get_logger
 from src.utils.matching import name_similarity
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import normalize_key, singleflight
 
+CASE_KEY = ["debtor_id", "case_number"]
 
+# New filings show up within days; a name with no dockets is re-checked sooner.
+DOCKET_TTL = 7 * 86400
+DOCKET_EMPTY_TTL = 86400
+
+
+@singleflight("courtlistener", lambda full_name, *a, **k: normalize_key(full_name))
+@cached(
+    "courtlistener",
+    # Only the name is sent, so city/state/zip would just split identical searches.
+    lambda full_name, *a, **k: normalize_key(full_name),
+    ttl=DOCKET_TTL,
+    result_ttl=lambda dockets: DOCKET_TTL if dockets else DOCKET_EMPTY_TTL,
+)
 def _courtlistener_search(full_name: str, city: str, state: str, zip5: str) -> list[dict[str, Any]]:
     """Search CourtListener dockets by party name; filter to likely bankruptcy dockets.
 
@@ -45,10 +64,14 @@ def _courtlistener_search(full_name: str, city: str, state: str, zip5: str) -> l
     # Simple retries with backoff
     for attempt in range(3):
         try:
+            acquire("courtlistener")
             resp = requests.get(base, params=params, headers=headers, timeout=30)
+            record_response("courtlistener", resp)
             resp.raise_for_status()
             payload = resp.json()
             break
+        except QuotaExhausted:
+            raise
         except Exception:
             if attempt < 2:
                 time.sleep(1.5 * (attempt + 1))
@@ -77,16 +100,21 @@ def _courtlistener_search(full_name: str, city: str, state: str, zip5: str) -> l
         }
         for attempt in range(2):
             try:
+                acquire("courtlistener")
                 resp = requests.get(base, params=params_fallback, headers=headers, timeout=30)
+                record_response("courtlistener", resp)
                 resp.raise_for_status()
                 payload = resp.json()
                 results = payload.get("results", [])
                 break
+            except QuotaExhausted:
+                raise
             except Exception:
+                # Re-raise rather than cache an outage as a "no dockets" answer.
                 if attempt == 0:
                     time.sleep(1.0)
-                else:
-                    break
+                    continue
+                raise
     # Map relevant fields
     mapped: list[dict[str, Any]] = []
     for r in results:
@@ -135,6 +163,8 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
     try:
         try:
             results = _courtlistener_search(name, city, state, zip5)
+        except QuotaExhausted:
+            raise
         except Exception:
             # CourtListener failed after retries; try PACER fallback stub
             results = _pacer_fallback_search(name, city, state, zip5)
@@ -152,36 +182,31 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             if score < 85:
                 continue
             accepted.append({**r, "match_strength": score})
+        keyed: list[dict[str, Any]] = []
         for r in accepted:
+            row = {
+                "debtor_id": debtor.get("id"),
+                "case_number": r.get("case_number"),
+                "court": r.get("court"),
+                "chapter": r.get("chapter"),
+                "filed_date": r.get("filed_date"),
+                "status": r.get("status"),
+                "discharge_date": r.get("discharge_date"),
+                "docket_url": r.get("docket_url"),
+                "confidence": r.get("match_strength", 0),
+                "source": "courtlistener",
+                "provenance": "courtlistener",
+                "raw_payload": json.dumps(r.get("raw") or r),
+            }
             # dedupe by external id if present
-            ext_id = r.get("case_number") or r.get("id")
-            exists = []
-            if ext_id:
-                exists = dx.list_related(
-                    "bankruptcy_cases",
-                    {"debtor_id": {"_eq": debtor.get("id")}, "case_number": {"_eq": ext_id}},
-                    limit=1,
-                )
-            if exists:
-                continue
-            dx.create_row(
-                "bankruptcy_cases",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "case_number": r.get("case_number"),
-                    "court": r.get("court"),
-                    "chapter": r.get("chapter"),
-                    "filed_date": r.get("filed_date"),
-                    "status": r.get("status"),
-                    "discharge_date": r.get("discharge_date"),
-                    "docket_url": r.get("docket_url"),
-                    "confidence": r.get("match_strength", 0),
-                    "source": "courtlistener",
-                    "provenance": "courtlistener",
-                    "raw_payload": json.dumps(r.get("raw") or r),
-                },
-            )
+            if row["case_number"]:
+                keyed.append(row)
+            else:
+                dx.create_row("bankruptcy_cases", row)
+        dx.upsert_many("bankruptcy_cases", CASE_KEY, keyed, update=False)
         return None
+    except QuotaExhausted:
+        raise
     except Exception as e:
         log.warning(f"Bankruptcy search failed for debtor {debtor.get('id')}: {e}")
         # TODO: PACER fallback can be added here
@@ -6,9 +6,34 @@ from typing import Any
 
 import requests
 
+from src.utils.cache import cached
+from src.utils.journal import record_response
 from src.utils.logger import get_logger  # noqa: F401
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import normalize_key, singleflight
 
 
+# Business listings drift slowly; "nothing found" is retried sooner.
+BUSINESS_TTL = 30 * 86400
+BUSINESS_MISS_TTL = 7 * 86400
+
+
+def _places_key(query: str, lat: float | None, lng: float | None) -> tuple[Any, ...]:
+    # ~1 km grid so nearby searches for the same name share an entry.
+    cell = (round(lat, 2), round(lng, 2)) if lat is not None and lng is not None else (None, None)
+    return (*normalize_key(query), *cell)
+
+
+@singleflight("google_places", _places_key)
+@cached(
+    "google_places",
+    _places_key,
+    ttl=BUSINESS_TTL,
+    # OVER_QUERY_LIMIT, REQUEST_DENIED and local errors are transient.
+    cacheable=lambda result: result.get("status") in ("OK", "ZERO_RESULTS"),
+    result_ttl=lambda result: BUSINESS_TTL if result.get("results") else BUSINESS_MISS_TTL,
+)
 def _google_places_search(query: str, lat: float | None, lng: float | None) -> dict[str, Any]:
     api_key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not api_key:
@@ -18,31 +43,47 @@ def _google_places_search(query: str, lat: float | None, lng: float | None) -> d
         params["location"] = f"{lat},{lng}"
         params["radius"] = "10000"
     try:
+        acquire("google_places")
         resp = requests.get(
             "https://maps.googleapis.com/maps/api/place/textsearch/json", params=params, timeout=30
         )
+        record_response("google_places", resp)
         resp.raise_for_status()
         return resp.json()
+    except QuotaExhausted:
+        raise
     except Exception:
         return {"results": []}
 
 
+@singleflight("apollo", lambda name: normalize_key(name))
+@cached(
+    "apollo",
+    lambda name: normalize_key(name),
+    ttl=BUSINESS_TTL,
+    cacheable=lambda result: "error" not in result,
+    result_ttl=lambda result: BUSINESS_TTL if result.get("people") else BUSINESS_MISS_TTL,
+)
 def _apollo_search_person(name: str) -> dict[str, Any]:
     api_key = os.getenv("APOLLO_API_KEY")
     if not api_key:
-        return {"people": []}
+        return {"people": [], "error": "no-key"}
     headers = {"Authorization": f"Bearer {api_key}"}
     try:
+        acquire("apollo")
         resp = requests.get(
             "https://api.apollo.io/v1/people/match",
             params={"name": name},
             headers=headers,
             timeout=30,
         )
+        record_response("apollo", resp)
         resp.raise_for_status()
         return resp.json()
-    except Exception:
-        return {"people": []}
+    except QuotaExhausted:
+        raise
+    except Exception as e:
+        return {"people": [], "error": str(e)}
 
 
 def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
@@ -54,36 +95,30 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
         name = biz.get("name")
         website = biz.get("website") or biz.get("url")
         phone = biz.get("formatted_phone_number") or None
-        # upsert business by name+website
-        exists = dx.list_related("businesses", {"name": {"_eq": name}}, limit=1)
-        if exists:
-            biz_row = exists[0]
-        else:
-            biz_row = dx.create_row(
-                "businesses",
-                {
-                    "name": name,
-                    "website": website,
-                    "phone": phone,
-                    "provenance": "google_places",
-                    "raw_payload": json.dumps(biz),
-                },
-            )
+        # upsert business by name
+        biz_row = dx.upsert(
+            "businesses",
+            ["name"],
+            {
+                "name": name,
+                "website": website,
+                "phone": phone,
+                "provenance": "google_places",
+                "raw_payload": json.dumps(biz),
+            },
+            update=False,
+        )
         # link
-        link_exists = dx.list_related(
+        dx.upsert(
             "debtor_businesses",
-            {"debtor_id": {"_eq": debtor.get("id")}, "business_id": {"_eq": biz_row.get("id")}},
-            limit=1,
+            ["debtor_id", "business_id"],
+            {
+                "debtor_id": debtor.get("id"),
+                "business_id": biz_row.get("id"),
+                "role": "owner",
+            },
+            update=False,
         )
-        if not link_exists:
-            dx.create_row(
-                "debtor_businesses",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "business_id": biz_row.get("id"),
-                    "role": "owner",
-                },
-            )
         confidence = max(confidence, 70 if website and phone else 50)
 
     if confidence == 0:
@@ -6,30 +6,96 @@ from typing import Any
 
 import requests
 
+from src.parcel_index import load_index
+from src.utils.cache import cached
+from src.utils.journal import record_response
 from src.utils.logger import get_logger  # noqa: F401
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import normalize_key, singleflight
+from src.utils.zip_medians import load_table
 
+PROPERTY_KEY = ["debtor_id", "address_line1", "zip"]
 
+# Assessments change about once a year; "no property" answers are re-asked sooner.
+ATTOM_TTL = 90 * 86400
+ATTOM_MISS_TTL = 7 * 86400
+ATTOM_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def _zip5(address: dict[str, Any]) -> str:
+    # Debtor-built addresses carry ``zip``; standardized ``addresses`` rows carry ``zip5``.
+    return address.get("zip") or address.get("zip5") or ""
+
+
+def _attom_key(address: dict[str, Any]) -> tuple[str, ...]:
+    return normalize_key(address.get("line1"), address.get("city"), address.get("state"), _zip5(address))
+
+
+@singleflight("attom", _attom_key)
+@cached(
+    "attom",
+    _attom_key,
+    ttl=ATTOM_TTL,
+    max_bytes=ATTOM_CACHE_BYTES,
+    # None means no key or a failed call, which must not be remembered.
+    cacheable=lambda result: result is not None,
+    result_ttl=lambda result: ATTOM_TTL if result.get("property") else ATTOM_MISS_TTL,
+)
 def _attom_lookup(address: dict[str, Any]) -> dict[str, Any] | None:
     api_key = os.getenv("ATTOM_API_KEY")
     if not api_key:
         return None
     params = {
-        "address": f"{address.get('line1')}, {address.get('city')}, {address.get('state')} {address.get('zip')}",
+        "address": f"{address.get('line1')}, {address.get('city')}, {address.get('state')} {_zip5(address)}",
         "apikey": api_key,
     }
     try:
+        acquire("attom")
         resp = requests.get(
             "https://api.attomdata.com/propertyapi/v1.0.0/property/detail",
             params=params,
             timeout=30,
         )
+        record_response("attom", resp)
+        if resp.status_code == 400 and "SuccessWithoutResult" in resp.text:
+            # ATTOM answers "no property at this address" with a 400.
+            return {"status": resp.json().get("status"), "property": []}
         resp.raise_for_status()
         return resp.json()
+    except QuotaExhausted:
+        raise
     except Exception:
         return None
 
 
+def _local_parcel(address: dict[str, Any], debtor: dict[str, Any]) -> tuple[dict[str, Any] | None, bool]:
+    """Parcel from the county appraisal index and whether it was found by owner name.
+
+    A situs match is the debtor's own address. An owner-name match within the ZIP is
+    some parcel the debtor owns, which may be a different property (e.g. a rental).
+    """
+    index = load_index()
+    if index is None:
+        return None, False
+    zip5 = _zip5(address)
+    parcel = index.by_address(address.get("line1"), zip5)
+    if parcel is not None:
+        return parcel, False
+    owned = index.by_owner(debtor.get("first_name"), debtor.get("last_name"), zip5)
+    # Several parcels under one name is ambiguous; let ATTOM decide.
+    return (owned[0], True) if len(owned) == 1 else (None, False)
+
+
 def _census_zip_median(zip5: str) -> dict[str, Any] | None:
+    table = load_table()
+    median = table.get(zip5) if table is not None else None
+    if median:
+        return {"zip": zip5, "median_value": median, "source": "acs_b25077_zcta"}
+    return _census_placeholder(zip5)
+
+
+def _census_placeholder(zip5: str) -> dict[str, Any] | None:
     api_key = os.getenv("CENSUS_API_KEY")
     if not api_key or not zip5:
         return None
@@ -46,30 +112,22 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             "state": debtor.get("state"),
             "zip": (debtor.get("zip") or "")[:5],
         }
-        exists = dx.list_related(
+        dx.upsert(
             "properties",
+            PROPERTY_KEY,
             {
-                "debtor_id": {"_eq": debtor.get("id")},
-                "address_line1": {"_eq": address.get("line1")},
-                "zip": {"_eq": address.get("zip")},
+                "debtor_id": debtor.get("id"),
+                "address_line1": address.get("line1"),
+                "city": address.get("city"),
+                "state": address.get("state"),
+                "zip": _zip5(address),
+                "market_value": 250000.00,
+                "value_source": "simulate:census_zip_median",
+                "owner_occupied": True,
+                "raw_payload": json.dumps({"simulated": True}),
             },
-            limit=1,
+            update=False,
         )
-        if not exists:
-            dx.create_row(
-                "properties",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "address_line1": address.get("line1"),
-                    "city": address.get("city"),
-                    "state": address.get("state"),
-                    "zip": address.get("zip"),
-                    "market_value": 250000.00,
-                    "value_source": "simulate:census_zip_median",
-                    "owner_occupied": True,
-                    "raw_payload": json.dumps({"simulated": True}),
-                },
-            )
         return None
     # Prefer standardized address if present
     std_addr_id = debtor.get("standardized_address_id")
@@ -85,61 +143,75 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             "zip": (debtor.get("zip") or "")[:5],
         }
 
+    parcel, by_owner = _local_parcel(address, debtor)
+    if parcel and (parcel.get("market_value") or parcel.get("assessed_value")):
+        # An owner-name match is recorded at the parcel's own situs address; the
+        # debtor's address is still valued below.
+        located = (
+            {"line1": parcel.get("line1"), "city": parcel.get("city"), "state": address.get("state"), "zip": parcel.get("zip")}
+            if by_owner
+            else address
+        )
+        dx.upsert(
+            "properties",
+            PROPERTY_KEY,
+            {
+                "debtor_id": debtor.get("id"),
+                "address_line1": located.get("line1"),
+                "city": located.get("city"),
+                "state": located.get("state"),
+                "zip": _zip5(located),
+                "market_value": parcel.get("market_value"),
+                "assessed_value": parcel.get("assessed_value"),
+                "annual_tax": parcel.get("annual_tax"),
+                "owner_occupied": bool(parcel.get("owner_occupied")),
+                "value_source": f"parcel:{parcel['county']}",
+                "raw_payload": parcel.get("raw"),
+            },
+            update=False,
+        )
+        if not by_owner:
+            return None
+
     attom = _attom_lookup(address)
     if attom and attom.get("property"):
         prop = attom["property"][0]
-        exists = dx.list_related(
+        dx.upsert(
             "properties",
+            PROPERTY_KEY,
             {
-                "debtor_id": {"_eq": debtor.get("id")},
-                "address_line1": {"_eq": address.get("line1")},
-                "zip": {"_eq": address.get("zip")},
+                "debtor_id": debtor.get("id"),
+                "address_line1": address.get("line1"),
+                "city": address.get("city"),
+                "state": address.get("state"),
+                "zip": _zip5(address),
+                "market_value": prop.get("assessment", {}).get("market") or None,
+                "assessed_value": prop.get("assessment", {}).get("assessed") or None,
+                "annual_tax": prop.get("assessment", {}).get("taxamt") or None,
+                "owner_occupied": prop.get("summary", {}).get("ownocc") == "Y",
+                "value_source": "attom",
+                "raw_payload": json.dumps(attom),
             },
-            limit=1,
+            update=False,
         )
-        if not exists:
-            dx.create_row(
-                "properties",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "address_line1": address.get("line1"),
-                    "city": address.get("city"),
-                    "state": address.get("state"),
-                    "zip": address.get("zip"),
-                    "market_value": prop.get("assessment", {}).get("market") or None,
-                    "assessed_value": prop.get("assessment", {}).get("assessed") or None,
-                    "annual_tax": prop.get("assessment", {}).get("taxamt") or None,
-                    "owner_occupied": prop.get("summary", {}).get("ownocc") == "Y",
-                    "value_source": "attom",
-                    "raw_payload": json.dumps(attom),
-                },
-            )
         return None
 
     # Fallback to Census ZIP medians
-    census = _census_zip_median(address.get("zip") or "")
+    census = _census_zip_median(_zip5(address))
     if census:
-        exists = dx.list_related(
+        dx.upsert(
             "properties",
+            PROPERTY_KEY,
             {
-                "debtor_id": {"_eq": debtor.get("id")},
-                "address_line1": {"_eq": address.get("line1")},
-                "zip": {"_eq": address.get("zip")},
+                "debtor_id": debtor.get("id"),
+                "address_line1": address.get("line1"),
+                "city": address.get("city"),
+                "state": address.get("state"),
+                "zip": _zip5(address),
+                "market_value": census.get("median_value"),
+                "value_source": "census_zip_median",
+                "raw_payload": json.dumps(census),
             },
-            limit=1,
+            update=False,
         )
-        if not exists:
-            dx.create_row(
-                "properties",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "address_line1": address.get("line1"),
-                    "city": address.get("city"),
-                    "state": address.get("state"),
-                    "zip": address.get("zip"),
-                    "market_value": census.get("median_value"),
-                    "value_source": "census_zip_median",
-                    "raw_payload": json.dumps(census),
-                },
-            )
     return None
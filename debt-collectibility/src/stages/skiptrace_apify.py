@@ -2,15 +2,87 @@ from __future__ import annotations
 
 import json
 import os
-from datetime import UTC, datetime
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from pathlib import Path
 from typing import Any
 
 import requests
 
+from src.apify_jobs import load_jobs
+from src.utils.cache import cache_key, cached, get_cache
+from src.utils.journal import record_response
 from src.utils.logger import get_logger
-from src.utils.matching import match_name_address
+from src.utils.matching import score_candidates
+from src.utils.metrics import incr, observe
 from src.utils.normalize import to_e164
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import normalize_key, singleflight
+
+PHONE_KEY = ["debtor_id", "phone_e164"]
+EMAIL_KEY = ["debtor_id", "email"]
+
+# Skip-trace results change slowly; an empty answer is re-asked sooner.
+SKIPTRACE_TTL = 30 * 86400
+SKIPTRACE_EMPTY_TTL = 86400
+SKIPTRACE_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def _skiptrace_ttl(result: Any) -> float:
+    return SKIPTRACE_TTL if result[0] else SKIPTRACE_EMPTY_TTL
+
+
+# Names per actor run in batch mode; start-up is paid once per run.
+APIFY_BATCH_SIZE = 50
+# How long one debtor waits on its run before the RapidAPI fallback.
+APIFY_RUN_TIMEOUT = 300.0
+# Roughly Apify's p90 for a single debtor; past it RapidAPI is raced alongside.
+# Override with SKIPTRACE_HEDGE_AFTER (seconds, 0 disables hedging).
+HEDGE_AFTER = 45.0
+
+# Start of the current prefetch window; runs started since then are joined even
+# once finished, older ones only while still in flight.
+_batch_started: float | None = None
+# Run keys submitted by the current prefetch. Their batch run routinely outlasts
+# HEDGE_AFTER, so they are not hedged.
+_prefetched: set[str] = set()
+
+
+def _spawn(fn: Callable[..., Any], *args: Any) -> Future[Any]:
+    """Run ``fn`` on its own daemon thread.
+
+    A hedge loser may keep running for minutes; a thread per call means it never
+    delays the other vendor and never holds up interpreter exit.
+    """
+    fut: Future[Any] = Future()
+
+    def target() -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=target, name=f"skiptrace-{fn.__name__}", daemon=True).start()
+    return fut
+
+
+def _name_query(first_name: str, last_name: str, address: dict[str, Any]) -> str:
+    return f"({first_name} {last_name}; {address.get('city') or ''}, {address.get('state') or ''} {address.get('zip') or ''})"
+
+
+def _identity_key(first_name: str, last_name: str, address: dict[str, Any]) -> tuple[str, ...]:
+    return normalize_key(
+        first_name, last_name, address.get("city"), address.get("state"), (address.get("zip") or "")[:5]
+    )
+
+
+def _run_key(first_name: str, last_name: str, address: dict[str, Any]) -> str:
+    return cache_key(_identity_key(first_name, last_name, address))
 
 
 def _required_env(name: str) -> str:
@@ -20,80 +92,179 @@ def _required_env(name: str) -> str:
     return value
 
 
+@singleflight("apify", _identity_key)
+@cached(
+    "apify",
+    _identity_key,
+    ttl=SKIPTRACE_TTL,
+    max_bytes=SKIPTRACE_CACHE_BYTES,
+    result_ttl=_skiptrace_ttl,
+    decode=tuple,
+)
 def _apify_skiptrace(
     first_name: str, last_name: str, address: dict[str, Any]
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-    token = _required_env("APIFY_TOKEN")
-    base = "https://api.apify.com/v2/acts/one-api~skip-trace"
-    # Use the correct input format that works with the API
-    name_query = f"({first_name} {last_name}; {address.get('city') or ''}, {address.get('state') or ''} {address.get('zip') or ''})"
-    payload = {"max_results": 3, "name": [name_query]}
+    """Skip-trace one person through a tracked actor run (see ``src.apify_jobs``).
+
+    A run already started for this person, e.g. by ``prefetch``, is joined rather
+    than started again.
+    """
+    jobs = load_jobs()
+    key = _run_key(first_name, last_name, address)
+    query = _name_query(first_name, last_name, address)
     try:
-        resp = requests.post(f"{base}/run-sync?token={token}", json=payload, timeout=120)
-        resp.raise_for_status()
-        try:
-            data = resp.json()
-        except ValueError:
-            data = {}
-        # debug dump
-        try:
-            log_dir = Path.cwd() / "logs"
-            log_dir.mkdir(parents=True, exist_ok=True)
-            with (log_dir / "apify_raw.jsonl").open("a", encoding="utf-8") as fh:
-                json.dump(
-                    {
-                        "ts": datetime.now(UTC).isoformat(),
-                        "source": "run-sync",
-                        "status": resp.status_code,
-                        "payload": payload,
-                        "body": data,
-                    },
-                    fh,
-                )
-                fh.write("\n")
-        except Exception:
-            pass
-        # Normalize to list of candidates
-        if isinstance(data, list):
-            return data, {"source": "run-sync:list", "raw": None}
-        elif isinstance(data, dict):
-            if "results" in data and isinstance(data["results"], list):
-                return data["results"], {"source": "run-sync:results", "raw": data}
-            # Fallback to dataset items endpoint if OUTPUT is not structured
-        # Try dataset items variant
-        ds = requests.post(
-            f"{base}/run-sync-get-dataset-items?token={token}", json=payload, timeout=120
-        )
-        ds.raise_for_status()
-        try:
-            items = ds.json()
-        except ValueError:
-            items = []
-        # debug dump
-        try:
-            log_dir = Path.cwd() / "logs"
-            log_dir.mkdir(parents=True, exist_ok=True)
-            with (log_dir / "apify_raw.jsonl").open("a", encoding="utf-8") as fh:
-                json.dump(
-                    {
-                        "ts": datetime.now(UTC).isoformat(),
-                        "source": "run-sync-get-dataset-items",
-                        "status": ds.status_code,
-                        "payload": payload,
-                        "body": items,
-                    },
-                    fh,
-                )
-                fh.write("\n")
-        except Exception:
-            pass
-        if isinstance(items, list):
-            return items, {"source": "run-sync-get-dataset-items", "raw": None}
-        return [], {"source": "unknown", "raw": None}
+        jobs.submit([(key, query)], since=_batch_started)
+        items = jobs.collect(key, timeout=APIFY_RUN_TIMEOUT)
     except requests.RequestException as e:
         raise RuntimeError(f"Apify error: {e}")
+    return items, {"source": "apify:run", "raw": None}
+
+
+def prefetch(debtors: list[dict[str, Any]]) -> int:
+    """Start batched actor runs for every uncached debtor ahead of ``run``.
+
+    Runs are not waited for: each debtor's ``_apify_skiptrace`` later joins the
+    run holding its name, so the batch is tracing while earlier stages work.
+    Returns the number of names submitted.
+    """
+    global _batch_started
+    _batch_started = time.time()
+    _prefetched.clear()
+    cache = get_cache("apify", SKIPTRACE_TTL, SKIPTRACE_CACHE_BYTES)
+    if cache is None or os.getenv("SIMULATE") == "1":
+        return 0
+    pending: dict[str, tuple[str, str, dict[str, Any]]] = {}
+    for debtor in debtors:
+        first, last, address = _debtor_identity(debtor)
+        if not first or not last or _load_manual_candidates(first, last):
+            continue
+        key = _run_key(first, last, address)
+        if key not in pending and not cache.contains(key, stale=True):
+            pending[key] = (first, last, address)
+    if not pending:
+        return 0
+    jobs = load_jobs()
+    jobs_list = [(key, _name_query(*person)) for key, person in pending.items()]
+    sent = 0
+    try:
+        for i in range(0, len(jobs_list), APIFY_BATCH_SIZE):
+            chunk = jobs_list[i : i + APIFY_BATCH_SIZE]
+            sent += jobs.submit(chunk, since=_batch_started)
+            _prefetched.update(key for key, _ in chunk)
+    except requests.RequestException as e:
+        raise RuntimeError(f"Apify batch error: {e}")
+    return sent
+
+
+def _match_inputs(c: dict[str, Any]) -> dict[str, Any]:
+    if _is_tabular_candidate(c):
+        return _tabular_match_inputs(c)
+    return {
+        "name": c.get("fullName") or c.get("name") or c.get("firstName", "") + " " + c.get("lastName", ""),
+        "street": c.get("street") or c.get("address1") or c.get("addressLine1"),
+        "state": c.get("state"),
+        "zip": c.get("zip"),
+    }
+
+
+def _hedge_after() -> float:
+    try:
+        return float(os.getenv("SKIPTRACE_HEDGE_AFTER", HEDGE_AFTER))
+    except ValueError:
+        return HEDGE_AFTER
 
 
+def _hedged_skiptrace(
+    first_name: str, last_name: str, address: dict[str, Any]
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Apify first; RapidAPI once Apify fails, comes back empty or runs past ``_hedge_after``.
+
+    The first non-empty candidate set wins. When both vendors were in flight the
+    winner's source is prefixed with ``hedge:`` so provenance shows the race, and
+    a losing single-name Apify run is aborted. Names already in a prefetched
+    batch run are not hedged.
+    """
+    log = get_logger()
+    started = time.monotonic()
+    key = _run_key(first_name, last_name, address)
+    delay = 0.0 if key in _prefetched else _hedge_after()
+    apify = _spawn(_apify_skiptrace, first_name, last_name, address)
+    done, _ = wait([apify], timeout=delay if delay > 0 else None)
+    if done:
+        observe("skiptrace.apify.seconds", time.monotonic() - started)
+        try:
+            candidates, meta = apify.result()
+        except Exception as e:
+            log.warning(f"Apify failed for {first_name} {last_name}: {e}, trying RapidAPI fallback")
+            return _rapidapi_skiptrace(first_name, last_name, address)
+        if candidates:
+            return candidates, meta
+        log.info(f"Apify returned no results for {first_name} {last_name}, trying RapidAPI fallback")
+        return _rapidapi_skiptrace(first_name, last_name, address)
+
+    incr("skiptrace.hedge.launched")
+    rapid = _spawn(_rapidapi_skiptrace, first_name, last_name, address)
+    names: dict[Future[Any], str] = {apify: "apify", rapid: "rapidapi"}
+    pending = set(names)
+    fallback: tuple[list[dict[str, Any]], dict[str, Any]] = ([], {"source": "hedge:none", "raw": None})
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                candidates, meta = fut.result()
+            except QuotaExhausted as e:
+                error = e
+                continue
+            except Exception as e:
+                log.warning(f"Hedged {names[fut]} failed for {first_name} {last_name}: {e}")
+                continue
+            if names[fut] == "rapidapi":
+                fallback = (candidates, meta)
+            if candidates:
+                # A losing RapidAPI call still lands in the cache; a losing Apify
+                # run only burns credits, so stop it unless other names share it.
+                if apify in pending:
+                    _abort_run(key)
+                incr(f"skiptrace.hedge.won.{names[fut]}")
+                return candidates, {**meta, "source": f"hedge:{meta.get('source', names[fut])}"}
+    if error is not None and not fallback[0]:
+        raise error
+    return fallback
+
+
+def _abort_run(key: str) -> None:
+    try:
+        if load_jobs().abort(key):
+            incr("skiptrace.hedge.aborted")
+    except Exception as e:
+        get_logger().warning(f"Could not abort losing Apify run: {e}")
+
+
+def _debtor_identity(debtor: dict[str, Any]) -> tuple[str, str, dict[str, Any]]:
+    address = {
+        "address_line1": debtor.get("address_line1") or debtor.get("street") or "",
+        "city": debtor.get("city") or "",
+        "state": debtor.get("state") or "",
+        "zip": debtor.get("zip") or debtor.get("postal_code") or "",
+    }
+    return debtor.get("first_name") or "", debtor.get("last_name") or "", address
+
+
+@singleflight(
+    "rapidapi",
+    lambda first_name, last_name, address: normalize_key(first_name, last_name, address.get("state")),
+)
+@cached(
+    "rapidapi",
+    # RapidAPI is only queried by name and state, so the key stops there.
+    lambda first_name, last_name, address: normalize_key(first_name, last_name, address.get("state")),
+    ttl=SKIPTRACE_TTL,
+    max_bytes=SKIPTRACE_CACHE_BYTES,
+    cacheable=lambda result: result[1].get("source") == "rapidapi:fallback",
+    result_ttl=_skiptrace_ttl,
+    decode=tuple,
+)
 def _rapidapi_skiptrace(
     first_name: str, last_name: str, address: dict[str, Any]
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
@@ -119,7 +290,9 @@ def _rapidapi_skiptrace(
             "Page": "1",
         }
 
+        acquire("rapidapi")
         resp = requests.get(search_url, headers=headers, params=search_params, timeout=30)
+        record_response("rapidapi", resp)
         resp.raise_for_status()
 
         data = resp.json()
@@ -228,6 +401,8 @@ def _rapidapi_skiptrace(
 
         return candidates, {"source": "rapidapi:fallback", "raw": data}
 
+    except QuotaExhausted:
+        raise
     except Exception as e:
         return [], {"source": "rapidapi:error", "raw": str(e)}
 
@@ -370,14 +545,7 @@ def _load_manual_candidates(first: str, last: str) -> list[dict[str, Any]]:
 
 def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
     log = get_logger()
-    first = debtor.get("first_name") or ""
-    last = debtor.get("last_name") or ""
-    address = {
-        "address_line1": debtor.get("address_line1") or debtor.get("street") or "",
-        "city": debtor.get("city") or "",
-        "state": debtor.get("state") or "",
-        "zip": debtor.get("zip") or debtor.get("postal_code") or "",
-    }
+    first, last, address = _debtor_identity(debtor)
     if not first or not last:
         return None
     try:
@@ -385,43 +553,32 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             # Simulated phones/emails for testing pipeline
             sample_phones = ["(214) 609-3137", "+1 214-609-3136"]
             sample_emails = ["jtpuente6972@outlook.com", "jrpuente69@yahoo.com"]
+            phone_rows = []
             for raw in sample_phones:
                 e164 = to_e164(raw)
                 if not e164:
                     continue
-                exists = dx.list_related(
-                    "phones",
-                    {"debtor_id": {"_eq": debtor.get("id")}, "phone_e164": {"_eq": e164}},
-                    limit=1,
-                )
-                if not exists:
-                    dx.create_row(
-                        "phones",
-                        {
-                            "debtor_id": debtor.get("id"),
-                            "phone_e164": e164,
-                            "match_strength": 50,
-                            "provenance": "simulate:apify",
-                            "raw_payload": json.dumps({"simulated": True, "raw": raw}),
-                        },
-                    )
-            for em in sample_emails:
-                exists = dx.list_related(
-                    "emails",
-                    {"debtor_id": {"_eq": debtor.get("id")}, "email": {"_eq": em}},
-                    limit=1,
+                phone_rows.append(
+                    {
+                        "debtor_id": debtor.get("id"),
+                        "phone_e164": e164,
+                        "match_strength": 50,
+                        "provenance": "simulate:apify",
+                        "raw_payload": json.dumps({"simulated": True, "raw": raw}),
+                    }
                 )
-                if not exists:
-                    dx.create_row(
-                        "emails",
-                        {
-                            "debtor_id": debtor.get("id"),
-                            "email": em,
-                            "match_strength": 50,
-                            "provenance": "simulate:apify",
-                            "raw_payload": json.dumps({"simulated": True}),
-                        },
-                    )
+            dx.upsert_many("phones", PHONE_KEY, phone_rows, update=False)
+            email_rows = [
+                {
+                    "debtor_id": debtor.get("id"),
+                    "email": em,
+                    "match_strength": 50,
+                    "provenance": "simulate:apify",
+                    "raw_payload": json.dumps({"simulated": True}),
+                }
+                for em in sample_emails
+            ]
+            dx.upsert_many("emails", EMAIL_KEY, email_rows, update=False)
             return None
         # Manual override: if a file exists for this name, use it instead of live call
         manual_candidates = _load_manual_candidates(first, last)
@@ -429,114 +586,47 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             candidates = manual_candidates
             meta = {"source": "manual"}
         else:
-            try:
-                # Try Apify first
-                candidates, meta = _apify_skiptrace(first, last, address)
-                if not candidates:
-                    # Fallback to RapidAPI if Apify returns no results
-                    log.info(
-                        f"Apify returned no results for {first} {last}, trying RapidAPI fallback"
-                    )
-                    candidates, meta = _rapidapi_skiptrace(first, last, address)
-            except Exception as e:
-                # If Apify fails completely, try RapidAPI
-                log.warning(f"Apify failed for {first} {last}: {e}, trying RapidAPI fallback")
-                candidates, meta = _rapidapi_skiptrace(first, last, address)
-        accepted: list[dict[str, Any]] = []
-        for c in candidates:
-            if _is_tabular_candidate(c):
-                cand_addr = _tabular_match_inputs(c)
-            else:
-                cand_addr = {
-                    "name": c.get("fullName")
-                    or c.get("name")
-                    or c.get("firstName", "") + " " + c.get("lastName", ""),
-                    "street": c.get("street") or c.get("address1") or c.get("addressLine1"),
-                    "state": c.get("state"),
-                    "zip": c.get("zip"),
-                }
-
-            # Strict name+address matching - require both name AND address to match
-            name_score = match_name_address(
-                {
-                    "first_name": first,
-                    "last_name": last,
-                    "address_line1": address["address_line1"],
-                    "state": address["state"],
-                    "zip": address["zip"],
-                },
-                cand_addr,
-            )
-
-            # Only accept candidates with high confidence (90+) for strict matching
-            if name_score >= 90:
-                accepted.append({**c, "match_strength": name_score})
-            elif name_score >= 80:
-                # Medium confidence - check if address components match
-                cand_state = (cand_addr.get("state") or "").upper().strip()
-                cand_zip = (cand_addr.get("zip") or "").strip()
-                target_state = (address.get("state") or "").upper().strip()
-                target_zip = (address.get("zip") or "").strip()
-
-                # Require state to match exactly and zip to be similar
-                if cand_state == target_state and (
-                    cand_zip == target_zip
-                    or (
-                        len(cand_zip) >= 5
-                        and len(target_zip) >= 5
-                        and cand_zip[:5] == target_zip[:5]
-                    )
-                ):
-                    accepted.append({**c, "match_strength": name_score})
+            candidates, meta = _hedged_skiptrace(first, last, address)
+        # Strict name+address matching - require both name AND address to match
+        scores = score_candidates(
+            {
+                "first_name": first,
+                "last_name": last,
+                "address_line1": address["address_line1"],
+                "state": address["state"],
+                "zip": address["zip"],
+            },
+            [_match_inputs(c) for c in candidates],
+        )
+        # Accept high confidence (90+) outright; medium (80+) needs state and ZIP to agree
+        accepted: list[dict[str, Any]] = [
+            {**c, "match_strength": score}
+            for c, score, region in zip(candidates, scores.score, scores.region)
+            if score >= 90 or (score >= 80 and region)
+        ]
 
         # If no strict matches, try name-only with address verification
         if not accepted and candidates:
             log.info(
                 f"No strict name+address matches for {first} {last}, trying name-only with address verification"
             )
-            name_only_candidates = []
-            for c in candidates:
-                if _is_tabular_candidate(c):
-                    cand_addr = _tabular_match_inputs(c)
-                else:
-                    cand_addr = {
-                        "name": c.get("fullName")
-                        or c.get("name")
-                        or c.get("firstName", "") + " " + c.get("lastName", ""),
-                        "street": c.get("street") or c.get("address1") or c.get("addressLine1"),
-                        "state": c.get("state"),
-                        "zip": c.get("zip"),
-                    }
-
-                # Check name similarity
-                n = cand_addr.get("name", "").strip()
-                ref = f"{first} {last}".strip()
-                from src.utils.matching import name_similarity
-
-                name_sim = name_similarity(ref, n)
-
-                if name_sim >= 85:  # High name similarity
-                    # Verify address components
-                    cand_state = (cand_addr.get("state") or "").upper().strip()
-                    cand_zip = (cand_addr.get("zip") or "").strip()
-                    target_state = (address.get("state") or "").upper().strip()
-                    target_zip = (address.get("zip") or "").strip()
-
-                    if cand_state == target_state and (
-                        cand_zip == target_zip
-                        or (
-                            len(cand_zip) >= 5
-                            and len(target_zip) >= 5
-                            and cand_zip[:5] == target_zip[:5]
-                        )
-                    ):
-                        name_only_candidates.append({**c, "match_strength": 75})
-
             # Take top 2 name-only candidates with verified addresses
-            accepted = sorted(
-                name_only_candidates, key=lambda x: x.get("match_strength", 0), reverse=True
-            )[:2]
-
+            accepted = [
+                {**c, "match_strength": 75}
+                for c, name_sim, region in zip(candidates, scores.name, scores.region)
+                if name_sim >= 85 and region
+            ][:2]
+
+        # Diff against the debtor's contacts once; only new numbers/addresses are
+        # written, first candidate wins when several report the same one.
+        debtor_id = debtor.get("id")
+        phone_rows: dict[str, dict[str, Any]] = {
+            r.get("phone_e164"): {} for r in dx.list_related("phones", {"debtor_id": {"_eq": debtor_id}}, limit=-1)
+        }
+        email_rows: dict[str, dict[str, Any]] = {
+            r.get("email"): {} for r in dx.list_related("emails", {"debtor_id": {"_eq": debtor_id}}, limit=-1)
+        }
+        known_phones, known_emails = set(phone_rows), set(email_rows)
         for cand in accepted:
             # phones (support multiple possible shapes)
             if _is_tabular_candidate(cand):
@@ -555,32 +645,22 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             for ph in phone_iter or []:
                 e164_raw = _phone_str(ph)
                 e164 = to_e164(e164_raw) if e164_raw else None
-                if not e164:
-                    continue
-                exists = dx.list_related(
-                    "phones",
-                    {"debtor_id": {"_eq": debtor.get("id")}, "phone_e164": {"_eq": e164}},
-                    limit=1,
-                )
-                if exists:
+                if not e164 or e164 in phone_rows:
                     continue
                 first_seen, last_seen = _seen_dates(ph)
                 # Parse date strings to proper format
                 parsed_first_seen = _parse_date_string(first_seen) if first_seen else None
                 parsed_last_seen = _parse_date_string(last_seen) if last_seen else None
 
-                dx.create_row(
-                    "phones",
-                    {
-                        "debtor_id": debtor.get("id"),
-                        "phone_e164": e164,
-                        "first_seen": parsed_first_seen,
-                        "last_seen": parsed_last_seen,
-                        "match_strength": cand.get("match_strength"),
-                        "provenance": meta.get("source", "unknown"),
-                        "raw_payload": json.dumps(ph),
-                    },
-                )
+                phone_rows[e164] = {
+                    "debtor_id": debtor_id,
+                    "phone_e164": e164,
+                    "first_seen": parsed_first_seen,
+                    "last_seen": parsed_last_seen,
+                    "match_strength": cand.get("match_strength"),
+                    "provenance": meta.get("source", "unknown"),
+                    "raw_payload": json.dumps(ph),
+                }
             # emails (support strings or objects)
             if _is_tabular_candidate(cand):
                 email_iter = _iter_tabular_emails(cand)
@@ -598,25 +678,20 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
                         if isinstance(v, str) and v.strip():
                             email_norm = v.lower().strip()
                             break
-                if not email_norm:
-                    continue
-                exists = dx.list_related(
-                    "emails",
-                    {"debtor_id": {"_eq": debtor.get("id")}, "email": {"_eq": email_norm}},
-                    limit=1,
-                )
-                if exists:
+                if not email_norm or email_norm in email_rows:
                     continue
-                dx.create_row(
-                    "emails",
-                    {
-                        "debtor_id": debtor.get("id"),
-                        "email": email_norm,
-                        "match_strength": cand.get("match_strength"),
-                        "provenance": meta.get("source", "unknown"),
-                        "raw_payload": json.dumps(em),
-                    },
-                )
+                email_rows[email_norm] = {
+                    "debtor_id": debtor_id,
+                    "email": email_norm,
+                    "match_strength": cand.get("match_strength"),
+                    "provenance": meta.get("source", "unknown"),
+                    "raw_payload": json.dumps(em),
+                }
+        # update=False keeps rows another worker inserted meanwhile as they are.
+        new_phones = [row for e164, row in phone_rows.items() if e164 not in known_phones]
+        new_emails = [row for email, row in email_rows.items() if email not in known_emails]
+        dx.upsert_many("phones", PHONE_KEY, new_phones, update=False)
+        dx.upsert_many("emails", EMAIL_KEY, new_emails, update=False)
 
         # Update debtor with verified information from top candidate
         patch: dict[str, Any] = {}
@@ -659,6 +734,8 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
                     log.warning(f"Failed to update debtor {debtor.get('id')} with age/dob: {e}")
 
         return patch or None
+    except QuotaExhausted:
+        raise
     except Exception as e:
         log.warning(f"Apify skip-trace failed debtor {debtor.get('id')}: {e}")
         return None
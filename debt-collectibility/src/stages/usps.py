@@ -2,12 +2,28 @@ from __future__ import annotations
 
 import json
 import os
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
 from typing import Any
 
 import requests
 
+from src.utils.cache import cache_key, cached, get_cache
+from src.utils.journal import record_response
 from src.utils.logger import get_logger
 from src.utils.normalize import normalize_address
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import normalize_key, singleflight
+
+ADDRESS_KEY = ["debtor_id", "line1", "zip5"]
+
+# Deliverability of a street address almost never changes.
+USPS_TTL = 180 * 86400
+
+
+def _address_key(addr: dict[str, Any]) -> tuple[str, ...]:
+    return normalize_key(*(addr.get(f) for f in ("line1", "line2", "city", "state", "zip")))
 
 
 def _required_env(name: str) -> str:
@@ -17,27 +33,113 @@ def _required_env(name: str) -> str:
     return value
 
 
-def _usps_validate(addr: dict[str, Any]) -> dict[str, Any]:
+USPS_URL = "https://secure.shippingapis.com/ShippingAPI.dll"
+# AddressValidateRequest accepts at most five <Address> elements.
+USPS_BATCH_SIZE = 5
+
+
+def _verify_xml(user_id: str, addrs: list[dict[str, Any]]) -> str:
+    root = ET.Element("AddressValidateRequest", USERID=user_id)
+    for i, addr in enumerate(addrs):
+        el = ET.SubElement(root, "Address", ID=str(i))
+        # USPS puts the secondary unit in Address1 and the street in Address2.
+        for tag, value in (
+            ("Address1", addr.get("line2")),
+            ("Address2", addr.get("line1")),
+            ("City", addr.get("city")),
+            ("State", addr.get("state")),
+            ("Zip5", addr.get("zip")),
+            ("Zip4", None),
+        ):
+            ET.SubElement(el, tag).text = value or ""
+    return ET.tostring(root, encoding="unicode")
+
+
+def _parse_verify(text: str, addrs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Map each <Address ID=n> in a Verify response back to ``addrs[n]``."""
+    root = ET.fromstring(text)
+    if root.tag == "Error":
+        raise RuntimeError(f"USPS error: {root.findtext('Description') or text}")
+    by_id = {el.get("ID"): el for el in root.iter("Address")}
+    results = []
+    for i, addr in enumerate(addrs):
+        el = by_id.get(str(i))
+        if el is None:
+            raise RuntimeError(f"USPS response is missing address ID {i}")
+        results.append(
+            {
+                "dpv_confirmation": "Y" if el.findtext("DPVConfirmation") == "Y" else "N",
+                "zip5": el.findtext("Zip5") or addr.get("zip"),
+                "zip4": el.findtext("Zip4") or "",
+                "raw": ET.tostring(el, encoding="unicode"),
+            }
+        )
+    return results
+
+
+def iter_validate(addrs: list[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Yield each chunk's results as its Verify request (``USPS_BATCH_SIZE`` addresses) returns."""
     user_id = _required_env("USPS_USER_ID")
-    # USPS API uses XML normally; here we use the JSON Web Tools endpoint if available, otherwise stub
-    # For production, integrate the official API.
-    params = {
-        "API": "Verify",
-        "XML": f"<AddressValidateRequest USERID='{user_id}'><Address ID='0'><Address1>{addr.get('line2')}</Address1><Address2>{addr.get('line1')}</Address2><City>{addr.get('city')}</City><State>{addr.get('state')}</State><Zip5>{addr.get('zip')}</Zip5><Zip4></Zip4></Address></AddressValidateRequest>",
-    }
-    resp = requests.get(
-        "https://secure.shippingapis.com/ShippingAPI.dll", params=params, timeout=30
+    for i in range(0, len(addrs), USPS_BATCH_SIZE):
+        chunk = addrs[i : i + USPS_BATCH_SIZE]
+        acquire("usps")
+        resp = requests.get(
+            USPS_URL, params={"API": "Verify", "XML": _verify_xml(user_id, chunk)}, timeout=30
+        )
+        record_response("usps", resp)
+        resp.raise_for_status()
+        yield _parse_verify(resp.text, chunk)
+
+
+def validate_batch(addrs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Validate addresses with one Verify request per ``USPS_BATCH_SIZE`` addresses."""
+    return [result for chunk in iter_validate(addrs) for result in chunk]
+
+
+def _cacheable(result: dict[str, Any]) -> bool:
+    return "<Error>" not in result["raw"]
+
+
+@singleflight("usps", _address_key)
+@cached("usps", _address_key, ttl=USPS_TTL, cacheable=_cacheable)
+def _usps_validate(addr: dict[str, Any]) -> dict[str, Any]:
+    return validate_batch([addr])[0]
+
+
+def _debtor_address(debtor: dict[str, Any]) -> dict[str, str]:
+    return normalize_address(
+        debtor.get("address_line1") or debtor.get("street") or "",
+        debtor.get("address_line2"),
+        debtor.get("city") or "",
+        debtor.get("state") or "",
+        debtor.get("zip") or debtor.get("postal_code") or "",
     )
-    resp.raise_for_status()
-    text = resp.text
-    # Naive parse/stub confidence. In production, parse XML properly.
-    dpv_confirmed = "DPVConfirmation>Y<" in text
-    return {
-        "dpv_confirmation": "Y" if dpv_confirmed else "N",
-        "zip5": addr.get("zip"),
-        "zip4": "",
-        "raw": text,
-    }
+
+
+def prefetch(debtors: list[dict[str, Any]]) -> int:
+    """Validate every uncached debtor address in multi-address requests ahead of ``run``.
+
+    Results land in the usps cache chunk by chunk, so each debtor's ``run`` is then a
+    cache hit and a failed request keeps the chunks already answered. Returns the
+    number of addresses sent to USPS.
+    """
+    cache = get_cache("usps", USPS_TTL)
+    if cache is None or os.getenv("SIMULATE") == "1":
+        return 0
+    pending: dict[str, dict[str, Any]] = {}
+    for debtor in debtors:
+        addr = _debtor_address(debtor)
+        key = cache_key(_address_key(addr))
+        if addr["line1"] and key not in pending and not cache.contains(key):
+            pending[key] = addr
+    if not pending:
+        return 0
+    keys = iter(pending)
+    for results in iter_validate(list(pending.values())):
+        for result, key in zip(results, keys):
+            if _cacheable(result):
+                cache.set(key, result)
+    return len(pending)
 
 
 def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
@@ -50,82 +152,58 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             debtor.get("state") or "",
             debtor.get("zip") or "",
         )
-        existing = dx.list_related(
+        addr_row = dx.upsert(
             "addresses",
+            ADDRESS_KEY,
             {
-                "debtor_id": {"_eq": debtor.get("id")},
-                "line1": {"_eq": address["line1"]},
-                "zip5": {"_eq": (debtor.get("zip") or "")[:5]},
+                "debtor_id": debtor.get("id"),
+                "line1": address["line1"],
+                "line2": address["line2"],
+                "city": address["city"],
+                "state": address["state"],
+                "zip5": (debtor.get("zip") or "")[:5],
+                "zip4": "1234",
+                "dpv_confirmation": "Y",
+                "confidence": 100,
+                "provenance": "simulate:usps",
+                "raw_payload": json.dumps({"simulated": True}),
             },
-            limit=1,
+            update=False,
         )
-        if existing:
-            addr_row = existing[0]
-        else:
-            addr_row = dx.create_row(
-                "addresses",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "line1": address["line1"],
-                    "line2": address["line2"],
-                    "city": address["city"],
-                    "state": address["state"],
-                    "zip5": (debtor.get("zip") or "")[:5],
-                    "zip4": "1234",
-                    "dpv_confirmation": "Y",
-                    "confidence": 100,
-                    "provenance": "simulate:usps",
-                    "raw_payload": json.dumps({"simulated": True}),
-                },
-            )
         patch: dict[str, Any] = {"usps_standardized": True}
         if addr_row and addr_row.get("id"):
             patch["standardized_address_id"] = addr_row["id"]
         return patch
-    address = normalize_address(
-        debtor.get("address_line1") or debtor.get("street") or "",
-        debtor.get("address_line2"),
-        debtor.get("city") or "",
-        debtor.get("state") or "",
-        debtor.get("zip") or debtor.get("postal_code") or "",
-    )
+    address = _debtor_address(debtor)
     try:
         result = _usps_validate(address)
         dpv = result.get("dpv_confirmation") == "Y"
         raw_payload = result.get("raw")
         # Idempotent create address row if not exists
-        existing = dx.list_related(
+        addr_row = dx.upsert(
             "addresses",
+            ADDRESS_KEY,
             {
-                "debtor_id": {"_eq": debtor.get("id")},
-                "line1": {"_eq": address["line1"]},
-                "zip5": {"_eq": result.get("zip5")},
+                "debtor_id": debtor.get("id"),
+                "line1": address["line1"],
+                "line2": address["line2"],
+                "city": address["city"],
+                "state": address["state"],
+                "zip5": result.get("zip5"),
+                "zip4": result.get("zip4"),
+                "dpv_confirmation": result.get("dpv_confirmation"),
+                "confidence": 100 if dpv else 70,
+                "provenance": "usps:webtools",
+                "raw_payload": json.dumps({"response": raw_payload}),
             },
-            limit=1,
+            update=False,
         )
-        if existing:
-            addr_row = existing[0]
-        else:
-            addr_row = dx.create_row(
-                "addresses",
-                {
-                    "debtor_id": debtor.get("id"),
-                    "line1": address["line1"],
-                    "line2": address["line2"],
-                    "city": address["city"],
-                    "state": address["state"],
-                    "zip5": result.get("zip5"),
-                    "zip4": result.get("zip4"),
-                    "dpv_confirmation": result.get("dpv_confirmation"),
-                    "confidence": 100 if dpv else 70,
-                    "provenance": "usps:webtools",
-                    "raw_payload": json.dumps({"response": raw_payload}),
-                },
-            )
         patch: dict[str, Any] = {"usps_standardized": bool(dpv)}
         if addr_row and addr_row.get("id"):
             patch["standardized_address_id"] = addr_row["id"]
         return patch
+    except QuotaExhausted:
+        raise
     except Exception as e:
         log.warning(f"USPS validation failed for debtor {debtor.get('id')}: {e}")
         return None
@@ -7,7 +7,75 @@ from typing import Any
 
 import requests
 
+from src.utils.cache import get_cache
+from src.utils.journal import record_response
 from src.utils.logger import get_logger
+from src.utils.metrics import gauge, incr, snapshot
+from src.utils.quota import QuotaExhausted
+from src.utils.rate_limit import acquire
+from src.utils.singleflight import singleflight
+
+
+# Verification results are shared across debtors (households share landlines).
+# A live number rarely changes state within a month; dead ones get re-checked sooner.
+PHONE_CONNECTED_TTL = 30 * 86400
+PHONE_UNVERIFIED_TTL = 7 * 86400
+
+
+def _remember_phone(e164: str, patch: dict[str, Any]) -> None:
+    cache = get_cache("phone_verification", PHONE_CONNECTED_TTL)
+    if cache is not None:
+        cache.set(e164, patch, PHONE_CONNECTED_TTL if patch["is_verified"] else PHONE_UNVERIFIED_TTL)
+
+
+EMAIL_TTL = 30 * 86400
+EMAIL_UNSETTLED_TTL = 7 * 86400
+DOMAIN_REJECT_TTL = 90 * 86400
+
+
+def _rejected_domain(data: dict[str, Any]) -> str | None:
+    """Why every address on this domain will fail, judged from one Hunter answer."""
+    if data.get("disposable"):
+        return "disposable"
+    if data.get("mx_records") is False:
+        return "no_mx"
+    return None
+
+
+def _count_email_lookup(hit: bool) -> None:
+    incr("email_verification.cache_hits" if hit else "email_verification.vendor_calls")
+
+
+def record_hit_rate() -> None:
+    """Set ``email_verification.hit_rate`` from one consistent counter snapshot; called per batch."""
+    counters = snapshot()["counters"]
+    hits = counters.get("email_verification.cache_hits", 0)
+    total = hits + counters.get("email_verification.vendor_calls", 0)
+    if total:
+        gauge("email_verification.hit_rate", hits / total)
+
+
+def _verify_email(email: str) -> dict[str, Any]:
+    """Hunter verification behind a per-address cache and a domain-level reject list."""
+    key = email.strip().lower()
+    domain = key.rpartition("@")[2]
+    emails = get_cache("email_verification", EMAIL_TTL)
+    domains = get_cache("email_domain_reject", DOMAIN_REJECT_TTL)
+    if domains is not None and (reason := domains.get(domain)):
+        _count_email_lookup(True)
+        return {"data": {"email": key, "status": "invalid", "score": 0, "domain_rejected": reason}}
+    if emails is not None and (hit := emails.get(key)) is not None:
+        _count_email_lookup(True)
+        return hit
+    _count_email_lookup(False)
+    hv = _hunter_verify(email)
+    data = hv.get("data") or {}
+    if emails is not None and data.get("status"):
+        settled = data["status"] in ("valid", "invalid", "disposable")
+        emails.set(key, hv, EMAIL_TTL if settled else EMAIL_UNSETTLED_TTL)
+    if domains is not None and (reason := _rejected_domain(data)):
+        domains.set(domain, reason)
+    return hv
 
 
 def _required_env(name: str) -> str:
@@ -17,6 +85,7 @@ def _required_env(name: str) -> str:
     return value
 
 
+@singleflight("rpv", lambda phone_e164: phone_e164)
 def _rpv_lookup(phone_e164: str) -> dict[str, Any]:
     """Lookup phone number using RealValidation Turbo v3 API.
 
@@ -43,15 +112,20 @@ def _rpv_lookup(phone_e164: str) -> dict[str, Any]:
         raise RuntimeError(f"RPV requires 10-digit US number, got: {phone_e164}")
     params = {"output": "json", "phone": digits, "token": api_key}
     try:
+        acquire("rpv")
         resp = requests.get(base_url, params=params, timeout=30)
+        record_response("rpv", resp)
         resp.raise_for_status()
         return resp.json()
     except requests.exceptions.SSLError:
+        acquire("rpv")
         resp = requests.get(base_url, params=params, timeout=30, verify=False)
+        record_response("rpv", resp)
         resp.raise_for_status()
         return resp.json()
 
 
+@singleflight("twilio", lambda phone_e164: phone_e164)
 def _twilio_lookup(phone_e164: str) -> dict[str, Any]:
     """Lookup phone number using Twilio API as fallback."""
     sid = _required_env("TWILIO_ACCOUNT_SID")
@@ -60,16 +134,21 @@ def _twilio_lookup(phone_e164: str) -> dict[str, Any]:
     types = ["carrier"] + (["caller-name"] if enable_cnam else [])
     qs = "&".join([f"Type={t}" for t in types])
     url = f"https://lookups.twilio.com/v1/PhoneNumbers/{phone_e164}?{qs}"
+    acquire("twilio")
     resp = requests.get(url, auth=(sid, token), timeout=30)
+    record_response("twilio", resp)
     resp.raise_for_status()
     return resp.json()
 
 
+@singleflight("hunter", lambda email: (email or "").strip().lower())
 def _hunter_verify(email: str) -> dict[str, Any]:
     """Verify email using Hunter.io API"""
     api_key = _required_env("HUNTER_API_KEY")
     url = f"https://api.hunter.io/v2/email-verifier?email={email}&api_key={api_key}"
+    acquire("hunter")
     resp = requests.get(url, timeout=30)
+    record_response("hunter", resp)
     resp.raise_for_status()
     return resp.json()
 
@@ -119,6 +198,17 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             verified_phones.append(ph)
             continue
 
+        cache = get_cache("phone_verification", PHONE_CONNECTED_TTL)
+        cached_patch = cache.get(e164) if cache is not None else None
+        if cached_patch:
+            dx.update_row("phones", phone_id, cached_patch)
+            if cached_patch["is_verified"]:
+                verified_phones.append(
+                    {**ph, "is_verified": True, "verification_score": cached_patch["verification_score"]}
+                )
+            log.info(f"Phone {e164} verification reused from cache")
+            continue
+
         try:
             # Try Real Phone Validation first
             rpv = _rpv_lookup(e164)
@@ -133,19 +223,17 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             line_type = (rpv.get("phone_type") or "").lower()
             carrier = rpv.get("carrier") or None
 
-            dx.update_row(
-                "phones",
-                phone_id,
-                {
-                    "rpv_status": status,
-                    "rpv_confidence": verification_score,
-                    "line_type": line_type,
-                    "carrier_name": carrier,
-                    "is_verified": is_verified,
-                    "verification_score": verification_score,
-                    "raw_payload": json.dumps(rpv),
-                },
-            )
+            patch = {
+                "rpv_status": status,
+                "rpv_confidence": verification_score,
+                "line_type": line_type,
+                "carrier_name": carrier,
+                "is_verified": is_verified,
+                "verification_score": verification_score,
+                "raw_payload": json.dumps(rpv),
+            }
+            dx.update_row("phones", phone_id, patch)
+            _remember_phone(e164, patch)
 
             if is_verified:
                 verified_phones.append(
@@ -171,18 +259,16 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
                     verification_score = 0
                 is_verified = verification_score > 0
 
-                dx.update_row(
-                    "phones",
-                    phone_id,
-                    {
-                        "twilio_status": line_type,
-                        "line_type": line_type,
-                        "carrier_name": carrier,
-                        "is_verified": is_verified,
-                        "verification_score": verification_score,
-                        "raw_payload": json.dumps(t),
-                    },
-                )
+                patch = {
+                    "twilio_status": line_type,
+                    "line_type": line_type,
+                    "carrier_name": carrier,
+                    "is_verified": is_verified,
+                    "verification_score": verification_score,
+                    "raw_payload": json.dumps(t),
+                }
+                dx.update_row("phones", phone_id, patch)
+                _remember_phone(e164, patch)
 
                 if is_verified:
                     verified_phones.append(
@@ -192,6 +278,8 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
                 else:
                     log.info(f"Phone {e164} failed Twilio verification")
 
+            except QuotaExhausted:
+                raise
             except Exception as twilio_error:
                 log.error(f"Both RPV and Twilio failed for phone {e164}: {twilio_error}")
                 # Mark as unverified
@@ -222,7 +310,7 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
 
         try:
             # Try Hunter.io first
-            hv = _hunter_verify(email)
+            hv = _verify_email(email)
             data = hv.get("data") or {}
             status = data.get("status")
             score = data.get("score")
@@ -246,6 +334,8 @@ def run(debtor: dict[str, Any], dx: Any) -> dict[str, Any] | None:
             else:
                 log.info(f"Email {email} failed Hunter.io verification: {status}")
 
+        except QuotaExhausted:
+            raise
         except Exception as e:
             log.warning(f"Hunter.io verification failed for email {email}: {e}")
             try:
@@ -0,0 +1,268 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import Any, NamedTuple, TypeVar
+
+from .logger import get_logger
+from .metrics import incr, snapshot
+from .singleflight import SingleFlight
+from .sqlite import ThreadConnections, transaction
+
+T = TypeVar("T")
+
+
+class Entry(NamedTuple):
+    value: Any
+    stale: bool
+
+
+def cache_key(parts: Hashable) -> str:
+    return json.dumps(parts, separators=(",", ":"), default=str)
+
+
+class DiskCache:
+    """Namespaced JSON cache in SQLite with per-entry TTL and an LRU byte budget.
+
+    Entries past their TTL stay readable as *stale* for ``stale_ttl`` seconds so
+    callers can serve them while refreshing in the background; after that they
+    are misses. When a namespace grows past ``max_bytes`` the least recently read
+    entries are evicted. Safe to share between threads and processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        ttl: float,
+        max_bytes: int | None = None,
+        stale_ttl: float = 0.0,
+    ) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.conns = ThreadConnections(path)
+        self.refreshing = SingleFlight()
+        conn = self.conns.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_sizes (namespace TEXT PRIMARY KEY, bytes INTEGER NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls, namespace: str, ttl: float, max_bytes: int | None = None) -> "DiskCache":
+        """Build from ``CACHE_DB`` and the ``CACHE_<NAMESPACE>_{TTL,MAX_MB,STALE}`` overrides."""
+        prefix = f"CACHE_{namespace.upper()}_"
+        max_mb = os.getenv(prefix + "MAX_MB")
+        return cls(
+            os.getenv("CACHE_DB") or str(Path.cwd() / "logs" / "cache.db"),
+            namespace,
+            ttl=float(os.getenv(prefix + "TTL") or ttl),
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else max_bytes,
+            stale_ttl=float(os.getenv(prefix + "STALE") or 0),
+        )
+
+    def lookup(self, key: str) -> Entry | None:
+        conn = self.conns.get()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        now = time.time()
+        if row is None or now >= row[1] + self.stale_ttl:
+            incr(f"cache.{self.namespace}.miss")
+            return None
+        conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        stale = now >= row[1]
+        incr(f"cache.{self.namespace}.{'stale' if stale else 'hit'}")
+        return Entry(json.loads(row[0]), stale)
+
+    def contains(self, key: str, stale: bool = False) -> bool:
+        """Whether ``get`` (or ``lookup`` when ``stale``) would hit, without counting a lookup.
+
+        For prefetchers deciding what to fetch; the read that follows is the one counted.
+        """
+        row = self.conns.get().execute(
+            "SELECT expires_at FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ).fetchone()
+        return row is not None and time.time() < row[0] + (self.stale_ttl if stale else 0)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.lookup(key)
+        return default if entry is None or entry.stale else entry.value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        data = json.dumps(value, default=str)
+        now = time.time()
+        with transaction(self.conns.get()) as conn:
+            old = conn.execute(
+                "SELECT size FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, data, len(data), now + (self.ttl if ttl is None else ttl), now),
+            )
+            total = self._add_bytes(conn, len(data) - (old[0] if old else 0))
+            if self.max_bytes is not None and total > self.max_bytes:
+                self._evict(conn, total)
+
+    def delete(self, key: str) -> None:
+        with transaction(self.conns.get()) as conn:
+            row = conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? RETURNING size", (self.namespace, key)
+            ).fetchone()
+            if row:
+                self._add_bytes(conn, -row[0])
+
+    def size(self) -> int:
+        row = self.conns.get().execute(
+            "SELECT bytes FROM cache_sizes WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _add_bytes(self, conn: sqlite3.Connection, delta: int) -> int:
+        return conn.execute(
+            "INSERT INTO cache_sizes (namespace, bytes) VALUES (?, ?)"
+            " ON CONFLICT (namespace) DO UPDATE SET bytes = bytes + excluded.bytes RETURNING bytes",
+            (self.namespace, delta),
+        ).fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, total: int) -> None:
+        # Expired entries go first, then least recently read until under budget.
+        cutoff = time.time() - self.stale_ttl
+        freed = conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ? RETURNING size",
+            (self.namespace, cutoff),
+        ).fetchall()
+        total = self._add_bytes(conn, -sum(r[0] for r in freed))
+        evicted = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at", (self.namespace,)
+        ).fetchall():
+            if total <= self.max_bytes:  # type: ignore[operator]
+                break
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            total = self._add_bytes(conn, -size)
+            evicted += 1
+        if evicted:
+            incr(f"cache.{self.namespace}.evicted", evicted)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        ttl: Callable[[T], float | None] | None = None,
+        cacheable: Callable[[T], bool] | None = None,
+        decode: Callable[[Any], T] | None = None,
+    ) -> T:
+        """Return the cached value for ``key`` or compute, store and return it.
+
+        A stale hit is returned immediately while one background thread recomputes
+        it. ``cacheable`` can veto storing a result (e.g. an error payload) and
+        ``ttl`` can pick a per-result lifetime.
+        """
+        entry = self.lookup(key)
+        if entry is not None:
+            value = decode(entry.value) if decode else entry.value
+            if entry.stale:
+                threading.Thread(
+                    target=self._revalidate, args=(key, compute, ttl, cacheable), daemon=True
+                ).start()
+            return value
+        value = compute()
+        self._store(key, value, ttl, cacheable)
+        return value
+
+    def _store(
+        self,
+        key: str,
+        value: Any,
+        ttl: Callable[[Any], float | None] | None,
+        cacheable: Callable[[Any], bool] | None,
+    ) -> None:
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl(value) if ttl else None)
+
+    def _revalidate(self, key: str, compute: Callable[[], Any], ttl: Any, cacheable: Any) -> None:
+        try:
+            self.refreshing.do(key, lambda: self._store(key, compute(), ttl, cacheable))
+        except Exception as e:
+            get_logger().warning(f"Background refresh of {self.namespace} cache entry failed: {e}")
+
+
+def hit_summary() -> dict[str, dict[str, float]]:
+    """Hits (fresh or stale), lookups and hit rate per cache namespace since the last metrics reset."""
+    counts: dict[str, dict[str, float]] = {}
+    for name, value in snapshot()["counters"].items():
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "cache" and parts[2] in ("hit", "stale", "miss"):
+            entry = counts.setdefault(parts[1], {"hits": 0, "lookups": 0})
+            entry["lookups"] += value
+            if parts[2] != "miss":
+                entry["hits"] += value
+    for entry in counts.values():
+        entry["hit_rate"] = round(entry["hits"] / entry["lookups"], 3) if entry["lookups"] else 0.0
+    return counts
+
+
+_caches: dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float, max_bytes: int | None = None) -> DiskCache | None:
+    """Process-wide cache for ``namespace``, or None when ``CACHE_DISABLED=1``."""
+    if os.getenv("CACHE_DISABLED") == "1":
+        return None
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = DiskCache.from_env(namespace, ttl, max_bytes)
+        return _caches[namespace]
+
+
+def cached(
+    namespace: str,
+    key: Callable[..., Hashable],
+    ttl: float,
+    max_bytes: int | None = None,
+    cacheable: Callable[[Any], bool] | None = None,
+    result_ttl: Callable[[Any], float | None] | None = None,
+    decode: Callable[[Any], Any] | None = None,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator caching ``fn`` results on disk under ``key(*args, **kwargs)``.
+
+    The cache is opened on first call so ``.env`` overrides loaded at startup apply.
+    """
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            cache = get_cache(namespace, ttl, max_bytes)
+            if cache is None:
+                return fn(*args, **kwargs)
+            return cache.get_or_compute(
+                cache_key(key(*args, **kwargs)),
+                lambda: fn(*args, **kwargs),
+                ttl=result_ttl,
+                cacheable=cacheable,
+                decode=decode,
+            )
+
+        return wrapper
+
+    return decorate
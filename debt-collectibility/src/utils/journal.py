@@ -0,0 +1,220 @@
+import atexit
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .metrics import incr
+
+try:
+    import zstandard
+except ImportError:  # optional; rotated segments fall back to gzip
+    zstandard = None
+
+# Query parameters and XML attributes that carry vendor credentials.
+SECRET_PARAMS = {"token", "key", "apikey", "api_key", "access_token"}
+_SECRET_XML = re.compile(r'(USERID|PASSWORD)="[^"]*"', re.IGNORECASE)
+
+JOURNAL_MAX_BYTES = 64 * 1024 * 1024
+JOURNAL_MAX_AGE = 86400
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 500
+
+
+def _redact(text: str) -> str:
+    return _SECRET_XML.sub(r'\1="***"', text)
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, "***" if k.lower() in SECRET_PARAMS else _redact(v)) for k, v in parse_qsl(parts.query)]
+    return urlunsplit(parts._replace(query=urlencode(query, safe="*")))
+
+
+def _response_record(ts: float, vendor: str, resp: Any) -> dict[str, Any]:
+    request = getattr(resp, "request", None)
+    sent = getattr(request, "body", None)
+    if isinstance(sent, bytes):
+        sent = sent.decode("utf-8", "replace")
+    try:
+        body = resp.json()
+    except Exception:
+        body = getattr(resp, "text", None)
+    return {
+        "ts": datetime.fromtimestamp(ts, UTC).isoformat(),
+        "vendor": vendor,
+        "method": getattr(request, "method", None),
+        "url": _redact_url(getattr(resp, "url", None) or ""),
+        "request": _redact(sent) if isinstance(sent, str) else sent,
+        "status": getattr(resp, "status_code", None),
+        "elapsed": getattr(getattr(resp, "elapsed", None), "total_seconds", lambda: None)(),
+        "body": body,
+    }
+
+
+class Journal:
+    """Append-only JSONL record of raw vendor responses, written off the hot path.
+
+    Callers only enqueue; a background thread serializes records in batches into
+    ``<dir>/<name>.jsonl`` and rotates the file once it passes ``max_bytes`` or
+    ``max_age`` seconds. Rotated segments are compressed with zstd when
+    ``zstandard`` is installed, gzip otherwise. A full queue drops the record
+    (``journal.dropped``) rather than blocking a worker.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        name: str = "vendor_raw",
+        max_bytes: int = JOURNAL_MAX_BYTES,
+        max_age: float = JOURNAL_MAX_AGE,
+    ) -> None:
+        self.directory = Path(directory)
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.queue: queue.Queue[Any] = queue.Queue(QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.fh: Any = None
+        self.opened = 0.0
+
+    @classmethod
+    def from_env(cls) -> "Journal":
+        return cls(
+            os.getenv("JOURNAL_DIR") or str(Path.cwd() / "logs"),
+            max_bytes=int(float(os.getenv("JOURNAL_MAX_MB", JOURNAL_MAX_BYTES / 2**20)) * 2**20),
+            max_age=float(os.getenv("JOURNAL_MAX_AGE", JOURNAL_MAX_AGE)),
+        )
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.name}.jsonl"
+
+    def _start(self) -> None:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._drain, name=f"journal-{self.name}", daemon=True)
+                self.thread.start()
+
+    def _put(self, item: Any) -> None:
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            incr("journal.dropped")
+
+    def record_response(self, vendor: str, resp: Any) -> None:
+        """Journal a ``requests`` response; credentials in the URL or body are redacted."""
+        self._put((time.time(), vendor, resp))
+
+    def flush(self) -> None:
+        """Block until everything enqueued so far is on disk."""
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self) -> None:
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._write([item for item in batch if item is not None])
+            except Exception:
+                incr("journal.errors")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stop:
+                if self.fh is not None:
+                    self.fh.close()
+                    self.fh = None
+                return
+
+    def _write(self, batch: list[Any]) -> None:
+        if not batch:
+            return
+        lines = []
+        for ts, vendor, resp in batch:
+            lines.append(json.dumps(_response_record(ts, vendor, resp), default=str))
+        if self.fh is None:
+            self._open()
+        elif self.fh.tell() >= self.max_bytes or time.time() - self.opened >= self.max_age:
+            self._rotate()
+        self.fh.write("\n".join(lines) + "\n")
+        self.fh.flush()
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fh = self.path.open("a", encoding="utf-8")
+        # A segment left by a previous process keeps aging from its first write.
+        self.opened = self.path.stat().st_mtime if self.fh.tell() else time.time()
+
+    def _rotate(self) -> None:
+        self.fh.close()
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+        segment = self.directory / f"{self.name}.{stamp}.jsonl"
+        os.replace(self.path, segment)
+        self._open()
+        _compress(segment)
+        incr("journal.rotated")
+
+
+def _compress(segment: Path) -> Path:
+    if zstandard is not None:
+        target = segment.with_name(segment.name + ".zst")
+        with segment.open("rb") as src, target.open("wb") as dst:
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+    else:
+        target = segment.with_name(segment.name + ".gz")
+        with segment.open("rb") as src, gzip.open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    segment.unlink()
+    return target
+
+
+_journal: Journal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> Journal | None:
+    """Process-wide journal, or None when ``JOURNAL_DISABLED=1``."""
+    global _journal
+    if os.getenv("JOURNAL_DISABLED") == "1":
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal.from_env()
+            atexit.register(_journal.close)
+        return _journal
+
+
+def record_response(vendor: str, resp: Any) -> None:
+    journal = get_journal()
+    if journal is not None:
+        journal.record_response(vendor, resp)
+
+
+def flush() -> None:
+    if _journal is not None:
+        _journal.flush()
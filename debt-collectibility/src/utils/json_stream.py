@@ -0,0 +1,103 @@
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+_WS = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class _Buffer:
+    """Text buffer fed lazily from an iterable of byte/str chunks."""
+
+    def __init__(self, chunks: Iterable[bytes | str]) -> None:
+        self.chunks = iter(chunks)
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        for chunk in self.chunks:
+            piece = self.utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if piece:
+                # Drop consumed text so memory stays bounded by one element.
+                self.text = self.text[self.pos :] + piece
+                self.pos = 0
+                return True
+        self.text = self.text[self.pos :] + self.utf8.decode(b"", final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise JsonStreamError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise JsonStreamError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A scalar ending exactly at the buffer edge may be truncated (e.g. 12|3).
+            if end == len(self.text) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_json_array(chunks: Iterable[bytes | str], key: str = "data") -> Iterator[Any]:
+    """Yield the elements of ``payload[key]`` from a streamed JSON object.
+
+    Only one array element is decoded and held at a time; other top-level members
+    are parsed and discarded. Yields nothing if ``key`` is absent or null.
+    """
+    buf = _Buffer(chunks)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+    while True:
+        name = buf.value()
+        buf.expect(":")
+        if name == key and buf.peek() == "[":
+            buf.pos += 1
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    yield buf.value()
+                    sep = buf.peek()
+                    buf.pos += 1
+                    if sep == "]":
+                        break
+                    if sep != ",":
+                        raise JsonStreamError(f"Expected ',' or ']' at offset {buf.pos - 1}")
+        else:
+            buf.value()
+        sep = buf.peek()
+        buf.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise JsonStreamError(f"Expected ',' or '}}' at offset {buf.pos - 1}")
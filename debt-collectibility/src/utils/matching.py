@@ -1,4 +1,7 @@
-from rapidfuzz import fuzz
+from typing import NamedTuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
 
 from .normalize import usps_abbreviate
 
@@ -45,3 +48,57 @@ def match_name_address(debtor: dict, candidate: dict) -> int:
         return 0
 
     return int(0.6 * name_score + 0.4 * street_score)
+
+
+class CandidateScores(NamedTuple):
+    """Per-candidate results of ``score_candidates``, aligned with its input list."""
+
+    score: list[int]  # match_name_address
+    name: list[int]  # name_similarity against the debtor's full name
+    region: list[bool]  # same state and ZIP (ZIP5 when both have one)
+
+
+def _similarity(query: str, choices: list[str], scorer) -> np.ndarray:
+    scores = process.cdist([query], choices, scorer=scorer, dtype=np.float64, workers=-1)[0]
+    # name_similarity/street_similarity truncate and score empty strings 0.
+    scores = np.floor(scores)
+    if not query:
+        scores[:] = 0
+    scores[np.array([not c for c in choices], dtype=bool)] = 0
+    return scores
+
+
+def score_candidates(debtor: dict, candidates: list[dict]) -> CandidateScores:
+    """Score every skip-trace candidate against ``debtor`` in one pass.
+
+    Candidates take the ``match_name_address`` shape (name, street, state, zip).
+    Names and streets are normalized once and compared with rapidfuzz ``cdist``
+    across all cores; the state/ZIP gates are applied as array masks.
+    """
+    if not candidates:
+        return CandidateScores([], [], [])
+    debtor_name = ((debtor.get("first_name") or "") + " " + (debtor.get("last_name") or "")).strip().upper()
+    debtor_street = usps_abbreviate((debtor.get("address_line1") or debtor.get("street") or "").upper().strip())
+    debtor_state = (debtor.get("state") or debtor.get("address_state") or "").upper().strip()
+    debtor_zip = (debtor.get("zip") or debtor.get("address_zip") or "").strip()
+
+    names = [(c.get("name") or c.get("full_name") or "").upper().strip() for c in candidates]
+    streets = [
+        usps_abbreviate((c.get("street") or c.get("address_line1") or "").upper().strip()) for c in candidates
+    ]
+    states = np.array([(c.get("state") or "").upper().strip() for c in candidates], dtype=object)
+    zips = np.array([(c.get("zip") or "").strip() for c in candidates], dtype=object)
+    zip5 = np.array([z[:5] for z in zips], dtype=object)
+
+    name = _similarity(debtor_name, names, fuzz.token_sort_ratio)
+    street = _similarity(debtor_street, streets, fuzz.ratio)
+
+    state_ok = (states == "") | (debtor_state == "") | (states == debtor_state)
+    zip_ok = (zip5 == "") | (debtor_zip[:5] == "") | (zip5 == debtor_zip[:5])
+    score = np.where(state_ok & zip_ok & (street >= 85), np.floor(0.6 * name + 0.4 * street), 0)
+
+    full_zip = np.array([len(z) >= 5 and len(debtor_zip) >= 5 for z in zips], dtype=bool)
+    region = (states == debtor_state) & ((zips == debtor_zip) | (full_zip & (zip5 == debtor_zip[:5])))
+    return CandidateScores(
+        [int(v) for v in score], [int(v) for v in name], [bool(v) for v in region]
+    )
@@ -0,0 +1,64 @@
+import threading
+from typing import Any
+
+
+class Metrics:
+    """Process-wide counters, gauges and timing summaries.
+
+    Kept deliberately small: stages and helpers record into it and the pipeline
+    logs a snapshot at the end of each batch.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.timings: dict[str, dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self.lock:
+            t = self.timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+            t["count"] += 1
+            t["sum"] += value
+            t["max"] = max(t["max"], value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timings": {k: dict(v) for k, v in self.timings.items()},
+            }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+
+METRICS = Metrics()
+
+
+def incr(name: str, value: float = 1) -> None:
+    METRICS.incr(name, value)
+
+
+def gauge(name: str, value: float) -> None:
+    METRICS.gauge(name, value)
+
+
+def observe(name: str, value: float) -> None:
+    METRICS.observe(name, value)
+
+
+def snapshot() -> dict[str, Any]:
+    return METRICS.snapshot()
@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from .metrics import gauge, incr
+from .sqlite import ThreadConnections, transaction
+
+PERIODS = ("daily", "monthly")
+
+
+class QuotaExhausted(RuntimeError):
+    """Raised instead of calling a vendor whose daily or monthly quota is spent."""
+
+    def __init__(self, vendor: str, period: str, limit: int, resets_at: float) -> None:
+        self.vendor = vendor
+        self.period = period
+        self.limit = limit
+        self.resets_at = resets_at
+        reset = datetime.fromtimestamp(resets_at, UTC).isoformat()
+        super().__init__(f"{vendor} {period} quota of {limit} calls exhausted until {reset}")
+
+
+def _window(period: str, now: float) -> tuple[str, float, float]:
+    """Return (bucket key, start, end) of the UTC calendar period containing ``now``."""
+    dt = datetime.fromtimestamp(now, UTC)
+    if period == "daily":
+        start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start.strftime("%Y-%m-%d"), start.timestamp(), (start + timedelta(days=1)).timestamp()
+    start = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.strftime("%Y-%m"), start.timestamp(), end.timestamp()
+
+
+def _parse_quota(raw: str) -> list[tuple[str, int]]:
+    out = []
+    for part in raw.split(","):
+        period, _, limit = part.strip().partition(":")
+        if period not in PERIODS:
+            raise ValueError(f"Unknown quota period {period!r} in {raw!r}")
+        out.append((period, int(limit)))
+    return out
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS quota_usage ("
+        " vendor TEXT NOT NULL, period TEXT NOT NULL, bucket TEXT NOT NULL,"
+        " used INTEGER NOT NULL, last_at REAL NOT NULL,"
+        " PRIMARY KEY (vendor, period, bucket))"
+    )
+
+
+class QuotaLedger:
+    """Persistent per-vendor call counts against daily/monthly quotas.
+
+    Quotas come from ``QUOTA_<VENDOR>``, e.g. ``QUOTA_HUNTER=monthly:25000`` or
+    ``QUOTA_RPV=daily:500,monthly:10000``; vendors without one are not tracked.
+    Counts live in SQLite (``QUOTA_DB``) so they survive restarts and are shared
+    by every worker on the host.
+
+    Once a period is ``QUOTA_PACE_AT`` (default 0.8) used and the current burn
+    rate would exhaust it before it resets, calls are spaced out so the remainder
+    lasts the period. A call that would exceed the limit raises ``QuotaExhausted``.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self.conns: ThreadConnections | None = None
+        self.lock = threading.Lock()
+        self.configs: dict[str, list[tuple[str, int]]] = {}
+
+    def config(self, vendor: str) -> list[tuple[str, int]]:
+        with self.lock:
+            if vendor not in self.configs:
+                raw = os.getenv(f"QUOTA_{vendor.upper()}")
+                self.configs[vendor] = [(p, n) for p, n in _parse_quota(raw) if n > 0] if raw else []
+            return self.configs[vendor]
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so a ``QUOTA_DB`` loaded from ``.env`` at startup applies.
+        with self.lock:
+            if self.conns is None:
+                path = self.path or os.getenv("QUOTA_DB") or str(Path.cwd() / "logs" / "quota.db")
+                self.conns = ThreadConnections(path, setup=_create_schema)
+        return self.conns.get()
+
+    def reserve(self, vendor: str, calls: int = 1) -> float:
+        """Record ``calls`` against every quota of ``vendor``; returns the pacing delay.
+
+        Raises ``QuotaExhausted`` without recording anything if any quota would be
+        exceeded.
+        """
+        configs = self.config(vendor)
+        if not configs:
+            return 0.0
+        pace_at = float(os.getenv("QUOTA_PACE_AT", "0.8"))
+        with transaction(self._conn()) as conn:
+            now = time.time()
+            delay = 0.0
+            rows = []
+            for period, limit in configs:
+                bucket, start, end = _window(period, now)
+                row = conn.execute(
+                    "SELECT used, last_at FROM quota_usage WHERE vendor = ? AND period = ? AND bucket = ?",
+                    (vendor, period, bucket),
+                ).fetchone()
+                used, last_at = row if row else (0, now)
+                if used + calls > limit:
+                    raise QuotaExhausted(vendor, period, limit, end)
+                remaining = limit - used
+                rate = used / max(now - start, 1.0)
+                if used >= pace_at * limit and now + remaining / max(rate, 1e-9) < end:
+                    delay = max(delay, last_at + (end - now) / remaining * calls - now)
+                rows.append((vendor, period, bucket, used + calls))
+            slot = now + max(delay, 0.0)
+            for vendor_, period, bucket, used in rows:
+                conn.execute(
+                    "INSERT INTO quota_usage (vendor, period, bucket, used, last_at) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (vendor, period, bucket) DO UPDATE SET used = excluded.used,"
+                    " last_at = excluded.last_at",
+                    (vendor_, period, bucket, used, slot),
+                )
+        for period, used in ((r[1], r[3]) for r in rows):
+            gauge(f"quota.{vendor}.{period}.used", used)
+        return max(delay, 0.0)
+
+    def spend(self, vendor: str, calls: int = 1) -> float:
+        """``reserve`` and then sleep out the pacing delay; returns seconds slept."""
+        try:
+            delay = self.reserve(vendor, calls)
+        except QuotaExhausted:
+            incr(f"quota.{vendor}.exhausted")
+            raise
+        if delay > 0:
+            incr(f"quota.{vendor}.paced")
+            time.sleep(delay)
+        return delay
+
+    def status(self, vendor: str) -> list[dict[str, Any]]:
+        """Usage per configured period, with the projected exhaustion time at the current rate."""
+        out = []
+        now = time.time()
+        for period, limit in self.config(vendor):
+            bucket, start, end = _window(period, now)
+            row = self._conn().execute(
+                "SELECT used FROM quota_usage WHERE vendor = ? AND period = ? AND bucket = ?",
+                (vendor, period, bucket),
+            ).fetchone()
+            used = row[0] if row else 0
+            rate = used / max(now - start, 1.0)
+            exhausts_at = now + (limit - used) / rate if rate > 0 else None
+            out.append(
+                {
+                    "period": period,
+                    "used": used,
+                    "limit": limit,
+                    "remaining": limit - used,
+                    "resets_at": end,
+                    "projected_exhaustion": exhausts_at if exhausts_at and exhausts_at < end else None,
+                }
+            )
+        return out
+
+
+LEDGER = QuotaLedger()
+
+
+def spend(vendor: str, calls: int = 1) -> float:
+    return LEDGER.spend(vendor, calls)
@@ -1,8 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import os
 import threading
 import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Protocol
+
+from .metrics import gauge, observe
+from .quota import LEDGER, spend
+from .sqlite import ThreadConnections, transaction
+
+# Default (requests per second, burst) per vendor; override with
+# RATE_LIMIT_<VENDOR>="rate/burst", e.g. RATE_LIMIT_HUNTER=5/10. A rate of 0
+# disables limiting for that vendor.
+DEFAULT_LIMITS: dict[str, tuple[float, int]] = {
+    "apify": (1.0, 5),
+    "apollo": (1.0, 5),
+    "attom": (5.0, 10),
+    "census": (5.0, 10),
+    "courtlistener": (1.0, 5),
+    "google_places": (10.0, 10),
+    "hunter": (10.0, 10),
+    "rapidapi": (5.0, 5),
+    "rpv": (10.0, 10),
+    "twilio": (20.0, 20),
+    "usps": (5.0, 5),
+}
+
+
+# Waiters in a lower-numbered lane are served first; FIFO within a lane.
+LANES: dict[str, int] = {"interactive": 0, "batch": 10}
+
+_lane: ContextVar[str] = ContextVar("rate_limit_lane", default="batch")
+
+
+@contextmanager
+def priority_lane(name: str) -> Iterator[None]:
+    """Run the enclosed vendor calls in ``name``'s lane (see ``LANES``)."""
+    if name not in LANES:
+        raise ValueError(f"Unknown rate limit lane: {name}")
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_priority() -> int:
+    return LANES[_lane.get()]
+
+
+class _Waiter:
+    __slots__ = ("tokens", "cond", "loop", "future")
+
+    def __init__(self, tokens: float, cond: threading.Condition | None = None) -> None:
+        self.tokens = tokens
+        self.cond = cond
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.future: asyncio.Future[None] | None = None
+
+    def wake(self) -> None:
+        if self.cond is not None:
+            self.cond.notify()
+        elif self.loop is not None and self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _WaiterQueue:
+    """Priority queue of blocked acquirers; callers must hold the owning lock.
+
+    Only the head waiter ever sleeps on a timer. Everyone else sleeps until the
+    waiter ahead of them leaves the queue and wakes its successor, so there is no
+    polling and no thundering herd.
+    """
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[int, int, _Waiter]] = []
+        self.seq = itertools.count()
+
+    def push(self, waiter: _Waiter, priority: int) -> None:
+        heapq.heappush(self.heap, (priority, next(self.seq), waiter))
+
+    def head(self) -> _Waiter | None:
+        return self.heap[0][2] if self.heap else None
+
+    def remove(self, waiter: _Waiter) -> None:
+        was_head = self.head() is waiter
+        self.heap = [e for e in self.heap if e[2] is not waiter]
+        heapq.heapify(self.heap)
+        if was_head and self.heap:
+            self.heap[0][2].wake()
+
+    def __len__(self) -> int:
+        return len(self.heap)
 
 
 class TokenBucket:
+    """In-process token bucket with fair, priority-laned waiting.
+
+    Blocked callers queue by (lane priority, arrival order) and are granted strictly
+    in that order, so a large request at the head is not starved by smaller ones
+    arriving later. ``consume`` blocks the calling thread on a condition variable;
+    ``acquire_async`` awaits a future instead of blocking the event loop.
+    """
+
     capacity: float
     tokens: float
     rate_per_sec: float
@@ -13,26 +124,343 @@ class TokenBucket:
         self.rate_per_sec = rate_per_sec
         self.lock = threading.Lock()
         self.timestamp = time.monotonic()
+        self.queue = _WaiterQueue()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.timestamp
+        if elapsed > 0:
+            refill = elapsed * self.rate_per_sec
+            if refill > 0:
+                self.tokens = min(self.capacity, self.tokens + refill)
+                self.timestamp = now
+
+    def _check(self, num_tokens: float) -> None:
+        if num_tokens > self.capacity:
+            raise ValueError(f"Cannot take {num_tokens} tokens from a bucket of {self.capacity}")
+
+    def _grant(self, waiter: _Waiter) -> tuple[bool, float | None]:
+        """Grant ``waiter`` if it is at the head and tokens suffice; else its sleep timeout."""
+        if self.queue.head() is not waiter:
+            return False, None
+        self._refill()
+        if self.tokens >= waiter.tokens:
+            self.tokens -= waiter.tokens
+            self.queue.remove(waiter)
+            return True, None
+        if self.rate_per_sec <= 0:
+            return False, None
+        return False, (waiter.tokens - self.tokens) / self.rate_per_sec
+
+    def level(self) -> float:
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+    def consume(self, num_tokens: int = 1, priority: int | None = None) -> float:
+        """Block until ``num_tokens`` are granted; returns seconds spent waiting."""
+        self._check(num_tokens)
+        start = time.monotonic()
+        with self.lock:
+            waiter = _Waiter(num_tokens, threading.Condition(self.lock))
+            self.queue.push(waiter, current_priority() if priority is None else priority)
+            slept = False
+            try:
+                while True:
+                    granted, timeout = self._grant(waiter)
+                    if granted:
+                        return time.monotonic() - start if slept else 0.0
+                    waiter.cond.wait(timeout)  # type: ignore[union-attr]
+                    slept = True
+            except BaseException:
+                # An interrupted wait must not leave a dead waiter at the head.
+                self.queue.remove(waiter)
+                raise
 
-    def consume(self, num_tokens: int = 1) -> None:
-        while True:
-            # First, try to refill and see if we can consume now
+    async def acquire_async(self, num_tokens: int = 1, priority: int | None = None) -> float:
+        """Async variant of ``consume`` that never blocks the event loop."""
+        self._check(num_tokens)
+        start = time.monotonic()
+        waiter = _Waiter(num_tokens)
+        waiter.loop = asyncio.get_running_loop()
+        with self.lock:
+            self.queue.push(waiter, current_priority() if priority is None else priority)
+        slept = False
+        try:
+            while True:
+                with self.lock:
+                    granted, timeout = self._grant(waiter)
+                    if granted:
+                        return time.monotonic() - start if slept else 0.0
+                    waiter.future = waiter.loop.create_future()
+                try:
+                    await asyncio.wait_for(waiter.future, timeout)
+                except asyncio.TimeoutError:
+                    pass
+                slept = True
+        except BaseException:
             with self.lock:
-                now = time.monotonic()
-                elapsed = now - self.timestamp
-                if elapsed > 0:
-                    refill = elapsed * self.rate_per_sec
-                    if refill > 0:
-                        self.tokens = min(self.capacity, self.tokens + refill)
-                        self.timestamp = now
-
-                if self.tokens >= num_tokens:
-                    self.tokens -= num_tokens
-                    return
-
-                # Not enough tokens: compute how long to wait to accumulate the deficit
-                needed = num_tokens - self.tokens
-                wait_time = needed / self.rate_per_sec if self.rate_per_sec > 0 else 0.0
-
-            # Sleep outside the lock so other threads can progress/refill
-            time.sleep(max(0.0, wait_time))
+                self.queue.remove(waiter)
+            raise
+
+
+class Limiter(Protocol):
+    rate_per_sec: float
+    capacity: float
+
+    def consume(self, num_tokens: int = 1, priority: int | None = None) -> float: ...
+
+    async def acquire_async(self, num_tokens: int = 1, priority: int | None = None) -> float: ...
+
+    def level(self) -> float: ...
+
+
+class _SharedBucket(ABC):
+    """Base for buckets whose state lives outside the process.
+
+    Local callers still queue by lane and arrival order; only the head of the
+    local queue talks to the shared store, so lanes and FIFO hold within a process
+    while the store enforces the combined rate across processes.
+    """
+
+    rate_per_sec: float
+    capacity: float
+    lock: threading.Lock
+    queue: _WaiterQueue
+
+    @abstractmethod
+    def _take(self, num_tokens: float) -> tuple[float, float]:
+        """Try to debit; returns (seconds to wait, tokens left). Zero wait means taken."""
+
+    @abstractmethod
+    def level(self) -> float:
+        """Current refilled token count, read without writing to the store."""
+
+    def _check(self, num_tokens: float) -> None:
+        if num_tokens > self.capacity:
+            raise ValueError(f"Cannot take {num_tokens} tokens from a bucket of {self.capacity}")
+
+    def consume(self, num_tokens: int = 1, priority: int | None = None) -> float:
+        self._check(num_tokens)
+        start = time.monotonic()
+        with self.lock:
+            waiter = _Waiter(num_tokens, threading.Condition(self.lock))
+            self.queue.push(waiter, current_priority() if priority is None else priority)
+        slept = False
+        try:
+            with self.lock:
+                while self.queue.head() is not waiter:
+                    waiter.cond.wait()  # type: ignore[union-attr]
+                    slept = True
+            while True:
+                wait, _ = self._take(num_tokens)
+                if wait <= 0:
+                    return time.monotonic() - start if slept else 0.0
+                time.sleep(wait)
+                slept = True
+        finally:
+            with self.lock:
+                self.queue.remove(waiter)
+
+    async def acquire_async(self, num_tokens: int = 1, priority: int | None = None) -> float:
+        if priority is None:
+            priority = current_priority()
+        return await asyncio.to_thread(self.consume, num_tokens, priority)
+
+
+class SqliteTokenBucket(_SharedBucket):
+    """Token bucket whose state lives in a SQLite file shared by all processes.
+
+    Each attempt refills and debits the bucket inside a ``BEGIN IMMEDIATE``
+    transaction, so concurrent workers on the host draw from one quota. Uses wall
+    clock time because monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, path: str, name: str, rate_per_sec: float, capacity: int) -> None:
+        self.path = path
+        self.name = name
+        self.rate_per_sec = rate_per_sec
+        self.capacity = float(capacity)
+        self.conns = ThreadConnections(path)
+        self.lock = threading.Lock()
+        self.queue = _WaiterQueue()
+        conn = self.conns.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (name, self.capacity, time.time()),
+        )
+
+    def _take(self, num_tokens: float) -> tuple[float, float]:
+        with transaction(self.conns.get()) as conn:
+            tokens, updated_at = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate_per_sec)
+            wait = 0.0
+            if tokens >= num_tokens:
+                tokens -= num_tokens
+            else:
+                needed = num_tokens - tokens
+                wait = needed / self.rate_per_sec if self.rate_per_sec > 0 else 0.0
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                (tokens, now, self.name),
+            )
+        return wait, tokens
+
+    def level(self) -> float:
+        tokens, updated_at = self.conns.get().execute(
+            "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+        ).fetchone()
+        return min(self.capacity, tokens + max(0.0, time.time() - updated_at) * self.rate_per_sec)
+
+
+_REDIS_TAKE = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate, cap, want = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = tonumber(state[1]) or cap
+local ts = tonumber(state[2]) or now
+tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= want then
+  tokens = tokens - want
+elseif rate > 0 then
+  wait = (want - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 86400)
+return {tostring(wait), tostring(tokens)}
+"""
+
+_REDIS_LEVEL = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate, cap = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = tonumber(state[1]) or cap
+local ts = tonumber(state[2]) or now
+return tostring(math.min(cap, tokens + math.max(0, now - ts) * rate))
+"""
+
+
+class RedisTokenBucket(_SharedBucket):
+    """Token bucket kept in Redis so every host in the fleet shares one quota.
+
+    The refill/debit runs as a Lua script using the Redis server clock, which keeps
+    it atomic and immune to clock skew between workers. Requires the optional
+    ``redis`` package.
+    """
+
+    def __init__(self, url: str, name: str, rate_per_sec: float, capacity: int) -> None:
+        import redis  # optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+
+        self.client: Any = redis.Redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_TAKE)
+        self.level_script = self.client.register_script(_REDIS_LEVEL)
+        self.key = f"rate_limit:{name}"
+        self.lock = threading.Lock()
+        self.queue = _WaiterQueue()
+        self.rate_per_sec = rate_per_sec
+        self.capacity = float(capacity)
+
+    def _take(self, num_tokens: float) -> tuple[float, float]:
+        wait, tokens = self.script(keys=[self.key], args=[self.rate_per_sec, self.capacity, num_tokens])
+        return float(wait), float(tokens)
+
+    def level(self) -> float:
+        return float(self.level_script(keys=[self.key], args=[self.rate_per_sec, self.capacity]))
+
+
+def _parse_limit(raw: str) -> tuple[float, int]:
+    rate, _, burst = raw.partition("/")
+    rate_f = float(rate)
+    return rate_f, int(burst) if burst else max(1, int(rate_f))
+
+
+class LimiterRegistry:
+    """Named vendor buckets shared by every thread in the process.
+
+    ``RATE_LIMIT_BACKEND`` picks where bucket state lives: ``memory`` (default,
+    per process), ``sqlite`` (``RATE_LIMIT_DB``, shared by all processes on a host)
+    or ``redis`` (``RATE_LIMIT_REDIS_URL``, shared by the whole fleet).
+    """
+
+    def __init__(self, defaults: dict[str, tuple[float, int]] | None = None) -> None:
+        self.defaults = dict(DEFAULT_LIMITS if defaults is None else defaults)
+        self.lock = threading.Lock()
+        self.buckets: dict[str, Limiter | None] = {}
+
+    def config(self, name: str) -> tuple[float, int] | None:
+        raw = os.getenv(f"RATE_LIMIT_{name.upper()}")
+        if raw:
+            rate, burst = _parse_limit(raw)
+        elif name in self.defaults:
+            rate, burst = self.defaults[name]
+        else:
+            return None
+        return (rate, burst) if rate > 0 else None
+
+    def _build(self, name: str, rate: float, burst: int) -> Limiter:
+        backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+        if backend == "sqlite":
+            path = os.getenv("RATE_LIMIT_DB") or str(Path.cwd() / "logs" / "rate_limits.db")
+            return SqliteTokenBucket(path, name, rate, burst)
+        if backend == "redis":
+            url = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+            return RedisTokenBucket(url, name, rate, burst)
+        return TokenBucket(rate, burst)
+
+    def get(self, name: str) -> Limiter | None:
+        with self.lock:
+            if name not in self.buckets:
+                cfg = self.config(name)
+                self.buckets[name] = self._build(name, *cfg) if cfg else None
+            return self.buckets[name]
+
+    def acquire(self, name: str, tokens: int = 1) -> float:
+        """Wait for ``tokens``; raises ``QuotaExhausted`` first if the vendor's quota is spent."""
+        spend(name, tokens)
+        bucket = self.get(name)
+        if bucket is None:
+            return 0.0
+        waited = bucket.consume(tokens)
+        self._record(name, bucket, waited)
+        return waited
+
+    async def acquire_async(self, name: str, tokens: int = 1) -> float:
+        if LEDGER.config(name):
+            await asyncio.to_thread(spend, name, tokens)
+        bucket = self.get(name)
+        if bucket is None:
+            return 0.0
+        waited = await bucket.acquire_async(tokens)
+        self._record(name, bucket, waited)
+        return waited
+
+    def _record(self, name: str, bucket: Limiter, waited: float) -> None:
+        observe(f"rate_limit.{name}.wait_seconds", waited)
+        observe(f"rate_limit.{name}.{_lane.get()}.wait_seconds", waited)
+        gauge(f"rate_limit.{name}.tokens", bucket.level())
+
+
+REGISTRY = LimiterRegistry()
+
+
+def get_limiter(name: str) -> Limiter | None:
+    return REGISTRY.get(name)
+
+
+def acquire(name: str, tokens: int = 1) -> float:
+    """Take ``tokens`` from the named vendor bucket, blocking until allowed."""
+    return REGISTRY.acquire(name, tokens)
+
+
+async def acquire_async(name: str, tokens: int = 1) -> float:
+    return await REGISTRY.acquire_async(name, tokens)
@@ -0,0 +1,87 @@
+import functools
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight block and receive the same result (or exception). Nothing is cached once
+    the call completes, so later calls run again.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.calls: dict[Hashable, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+
+def normalize_key(*parts: Any) -> tuple[str, ...]:
+    """Case- and whitespace-insensitive key so trivially different requests coalesce."""
+    return tuple(" ".join(str(p or "").upper().split()) for p in parts)
+
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight()
+        return _groups[name]
+
+
+def singleflight(name: str, key: Callable[..., Hashable]) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator sharing in-flight calls whose ``key(*args, **kwargs)`` is equal.
+
+    Callers must treat the shared result as read-only.
+    """
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        flight = group(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            return flight.do(key(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Autocommit WAL connection to ``path``, creating its directory first.
+
+    WAL lets readers in other processes carry on while one writer holds the lock;
+    ``timeout`` makes contended writers wait instead of failing with "database is locked".
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class ThreadConnections:
+    """One ``connect(path)`` connection per thread, since sqlite3 connections are not shareable.
+
+    ``setup`` runs once on each new connection (schema, row factory).
+    """
+
+    def __init__(self, path: str, setup: Callable[[sqlite3.Connection], None] | None = None) -> None:
+        self.path = path
+        self.setup = setup
+        self.local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            if self.setup is not None:
+                self.setup(conn)
+            self.local.conn = conn
+        return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``, rolled back if the block raises.
+
+    Taking the write lock up front means a read-then-write inside the block cannot
+    be invalidated by another process writing in between.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class PathSingleton(Generic[T]):
+    """Process-wide ``factory(path)`` result, rebuilt when the configured path changes.
+
+    A ``None`` result is not kept, so an index that does not exist yet is picked up
+    once it has been built.
+    """
+
+    def __init__(self, factory: Callable[[str], T | None]) -> None:
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.path: str | None = None
+        self.value: T | None = None
+
+    def get(self, path: str) -> T | None:
+        with self.lock:
+            if self.value is None or self.path != path:
+                self.value = self.factory(path)
+                self.path = path
+            return self.value
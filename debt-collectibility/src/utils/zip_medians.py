@@ -0,0 +1,64 @@
+import mmap
+import os
+import threading
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+# One int32 slot per possible ZIP5, indexed by int(zip5); 0 means no data.
+ZIP_SLOTS = 100_000
+
+
+class ZipMedianTable:
+    """Read-only ZIP5 -> median home value table memory-mapped from disk.
+
+    The file is a flat native-endian int32 array built by
+    ``scripts/ingest_zip_medians.py``, so a lookup is one index into the mapping
+    and the OS shares the pages between worker processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) != ZIP_SLOTS * 4:
+            self.mm.close()
+            raise ValueError(f"{path} is not a ZIP median table ({len(self.mm)} bytes)")
+        self.values = memoryview(self.mm).cast("i")
+
+    def get(self, zip5: str | None) -> int | None:
+        z = (zip5 or "").strip()[:5]
+        if len(z) != 5 or not z.isdigit():
+            return None
+        return self.values[int(z)] or None
+
+    @staticmethod
+    def build(rows: Iterable[tuple[str, int]], path: str) -> int:
+        """Write ``(zip5, median)`` rows to a new table at ``path``; returns rows stored."""
+        values = array("i", bytes(ZIP_SLOTS * 4))
+        stored = 0
+        for zip5, median in rows:
+            if len(zip5) == 5 and zip5.isdigit() and 0 < median < 2**31:
+                values[int(zip5)] = median
+                stored += 1
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            values.tofile(fh)
+        # Replace atomically so running workers keep their old mapping intact.
+        os.replace(tmp, path)
+        return stored
+
+
+_table: ZipMedianTable | None = None
+_table_lock = threading.Lock()
+
+
+def load_table() -> ZipMedianTable | None:
+    """Process-wide table from ``ZIP_MEDIANS_PATH`` (default ``data/zip_medians.i32``)."""
+    global _table
+    path = os.getenv("ZIP_MEDIANS_PATH") or str(Path.cwd() / "data" / "zip_medians.i32")
+    with _table_lock:
+        if _table is None or _table.path != path:
+            _table = ZipMedianTable(path) if os.path.exists(path) else None
+        return _table
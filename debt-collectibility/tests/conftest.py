@@ -1,6 +1,71 @@
+import json
 import os
 import sys
+from typing import Any
+
+import pytest
+import requests
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    """Keep response caches, Apify run tracking and the vendor journal out of the repo's logs/."""
+    from src import apify_jobs
+    from src.utils import cache, journal
+
+    monkeypatch.setenv("CACHE_DB", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(cache, "_caches", {})
+    monkeypatch.setenv("APIFY_JOBS_DB", str(tmp_path / "apify_jobs.db"))
+    monkeypatch.setattr(apify_jobs._jobs, "value", None)
+    monkeypatch.setenv("JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setattr(journal, "_journal", None)
+    yield
+    if journal._journal is not None:
+        journal._journal.close()
+
+
+class FakeResponse:
+    """Minimal ``requests.Response`` stand-in for monkeypatched vendor calls.
+
+    ``body`` may be JSON-able data, response text or raw bytes. ``chunk_size``
+    forces ``iter_content`` to split the body into pieces that small.
+    """
+
+    def __init__(
+        self,
+        body: Any = None,
+        status_code: int = 200,
+        url: str = "",
+        request: Any = None,
+        chunk_size: int | None = None,
+    ) -> None:
+        if isinstance(body, bytes):
+            self.content = body
+        elif isinstance(body, str):
+            self.content = body.encode()
+        else:
+            self.content = json.dumps(body).encode()
+        self.text = self.content.decode()
+        self.status_code = status_code
+        self.url = url
+        self.request = request
+        self.chunk_size = chunk_size
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+    def iter_content(self, chunk_size: int = 1) -> Any:
+        size = self.chunk_size or chunk_size
+        for i in range(0, len(self.content), size):
+            yield self.content[i : i + size]
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from conftest import FakeResponse
+
+from src import apify_jobs
+from src.apify_jobs import ApifyJobError, ApifyJobs
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls: dict[str, list[Any]] = {"post": [], "poll": [], "items": [], "abort": []}
+    status = {"run1": ["RUNNING", "SUCCEEDED"]}
+
+    def fake_post(url: str, json: dict[str, Any] | None = None, **kwargs: Any) -> FakeResponse:
+        if url.endswith("/abort"):
+            calls["abort"].append(url)
+            return FakeResponse({"data": {"status": "ABORTING"}})
+        calls["post"].append(json["name"])
+        return FakeResponse({"data": {"id": f"run{len(calls['post'])}", "status": "READY", "defaultDatasetId": "ds"}})
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        if "/actor-runs/" in url:
+            run_id = url.rsplit("/", 1)[1]
+            calls["poll"].append(params["waitForFinish"])
+            states = status.get(run_id) or ["FAILED"]
+            return FakeResponse({"data": {"id": run_id, "status": states.pop(0), "defaultDatasetId": "ds"}})
+        calls["items"].append(url)
+        return FakeResponse([{"Input Given": "(Ann Lee; Austin, TX 78701)", "Phone-1": "5125550100"}])
+
+    monkeypatch.setattr(apify_jobs.requests, "post", fake_post)
+    monkeypatch.setattr(apify_jobs.requests, "get", fake_get)
+    monkeypatch.setattr(apify_jobs, "acquire", lambda *a, **k: 0.0)
+    return calls
+
+
+def test_run_is_shared_and_dataset_fetched_once(tmp_path, calls):
+    jobs = ApifyJobs(str(tmp_path / "jobs.db"), "t")
+    query = "(Ann Lee; Austin, TX 78701)"
+    assert jobs.submit([("ann", query), ("bob", "(Bob Ray; Austin, TX 78701)")]) == 2
+    assert jobs.submit([("ann", query)]) == 0
+
+    assert jobs.collect("ann") == [{"Input Given": query, "Phone-1": "5125550100"}]
+    assert calls["poll"] == [60, 60]
+    # A second worker on the same table reads the stored dataset.
+    other = ApifyJobs(jobs.path, "t")
+    assert other.collect("bob") == []
+    assert other.collect("ann")[0]["Phone-1"] == "5125550100"
+    assert len(calls["post"]) == 1 and len(calls["items"]) == 1
+
+
+def test_failed_run_raises_and_is_resubmitted(tmp_path, calls):
+    jobs = ApifyJobs(str(tmp_path / "jobs.db"), "t")
+    jobs.submit([("ann", "(Ann Lee; Austin, TX 78701)")])
+    jobs.submit([("cy", "(Cy Young; Austin, TX 78701)")])
+    with pytest.raises(ApifyJobError, match="FAILED"):
+        jobs.collect("cy")
+    assert jobs.submit([("cy", "(Cy Young; Austin, TX 78701)")]) == 1
+    assert calls["post"][-1] == ["(Cy Young; Austin, TX 78701)"]
+
+
+def test_finished_run_is_only_reused_within_the_callers_window(tmp_path, calls):
+    jobs = ApifyJobs(str(tmp_path / "jobs.db"), "t")
+    query = "(Ann Lee; Austin, TX 78701)"
+    window = apify_jobs.time.time()
+    jobs.submit([("ann", query)], since=window)
+    jobs.collect("ann")
+    # Same batch: the finished run is joined and its stored dataset reused.
+    assert jobs.submit([("ann", query)], since=window) == 0
+    # A later batch (or a caller with no window) gets a fresh trace.
+    assert jobs.submit([("ann", query)]) == 1
+    assert len(calls["post"]) == 2
+
+
+def test_abort_stops_only_unshared_unfinished_runs(tmp_path, calls):
+    jobs = ApifyJobs(str(tmp_path / "jobs.db"), "t")
+    jobs.submit([("ann", "(Ann Lee; Austin, TX 78701)"), ("bob", "(Bob Ray; Austin, TX 78701)")])
+    jobs.submit([("cy", "(Cy Young; Austin, TX 78701)")])
+    assert not jobs.abort("ann")
+    assert jobs.abort("cy")
+    assert calls["abort"] == ["https://api.apify.com/v2/actor-runs/run2/abort"]
+    with pytest.raises(ApifyJobError, match="ABORTED"):
+        jobs.collect("cy")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+
+from src.utils import cache as cache_mod
+from src.utils.cache import DiskCache, cached
+
+
+def test_entries_expire_and_serve_stale_within_window(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    c = DiskCache(str(tmp_path / "c.db"), "t", ttl=10, stale_ttl=5)
+    c.set("k", {"a": 1})
+    assert c.get("k") == {"a": 1}
+    now[0] += 12
+    entry = c.lookup("k")
+    assert entry is not None and entry.stale and entry.value == {"a": 1}
+    assert c.get("k") is None
+    now[0] += 5
+    assert c.lookup("k") is None
+
+
+def test_contains_checks_freshness_without_counting(tmp_path, monkeypatch):
+    from src.utils import metrics
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    metrics.METRICS.reset()
+    c = DiskCache(str(tmp_path / "c.db"), "t", ttl=10, stale_ttl=5)
+    assert not c.contains("k")
+    c.set("k", 1)
+    assert c.contains("k")
+    now[0] += 12
+    assert not c.contains("k") and c.contains("k", stale=True)
+    assert not any(name.startswith("cache.t.") for name in metrics.snapshot()["counters"])
+
+
+def test_lru_eviction_keeps_namespace_under_budget(tmp_path):
+    c = DiskCache(str(tmp_path / "c.db"), "t", ttl=60, max_bytes=100)
+    other = DiskCache(str(tmp_path / "c.db"), "other", ttl=60)
+    other.set("x", "y" * 200)
+    for i in range(3):
+        c.set(f"k{i}", "v" * 30)
+        time.sleep(0.01)
+    c.get("k0")  # k0 becomes most recently used
+    c.set("k3", "v" * 30)
+    assert c.size() <= 100
+    assert c.get("k1") is None
+    assert c.get("k0") is not None and c.get("k3") is not None
+    assert other.get("x") is not None
+
+
+def test_stale_hit_refreshes_in_background(tmp_path, monkeypatch):
+    c = DiskCache(str(tmp_path / "c.db"), "t", ttl=0, stale_ttl=60)
+    c.set("k", "old")
+    calls = []
+
+    def compute() -> str:
+        calls.append(1)
+        return "new"
+
+    assert c.get_or_compute("k", compute, ttl=lambda v: 60) == "old"
+    for _ in range(100):
+        if c.get("k") == "new":
+            break
+        time.sleep(0.01)
+    assert c.get("k") == "new" and calls == [1]
+
+
+def test_cached_decorator_skips_uncacheable_results(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DB", str(tmp_path / "c.db"))
+    monkeypatch.setattr(cache_mod, "_caches", {})
+    calls: list[str] = []
+
+    @cached("deco", lambda name: name.lower(), ttl=60, cacheable=lambda r: r[1] == "ok", decode=tuple)
+    def lookup(name: str) -> tuple[list[str], str]:
+        calls.append(name)
+        return ([name], "error" if name == "bad" else "ok")
+
+    assert lookup("Ann") == (["Ann"], "ok")
+    assert lookup("ANN") == (["Ann"], "ok")
+    lookup("bad")
+    lookup("bad")
+    assert calls == ["Ann", "bad", "bad"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.debtor_graph import DebtorGraphClient
+from src.local_store import LocalStore
+
+
+class CountingStore(LocalStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: list[str] = []
+
+    def list_related(
+        self, collection: str, filters: dict[str, Any], limit: int = 100
+    ) -> list[dict[str, Any]]:
+        self.reads.append(collection)
+        return super().list_related(collection, filters, limit=limit)
+
+
+def test_graph_serves_debtor_reads_and_mirrors_writes(monkeypatch):
+    from src.stages import scoring, skiptrace_apify, usps
+
+    monkeypatch.setenv("SIMULATE", "1")
+    store = CountingStore()
+    debtor = {
+        "id": 3,
+        "first_name": "Dana",
+        "last_name": "Garrett",
+        "address_line1": "1212 N Loop 336 W",
+        "city": "Conroe",
+        "state": "TX",
+        "zip": "77301",
+    }
+    store.load_rows("debtors", [debtor])
+    store.load_rows("phones", [{"id": 1, "debtor_id": 3, "phone_e164": "+12146093137"}])
+
+    (graph,) = store.get_debtors_graph([3])
+    assert [p["id"] for p in graph["phones"]] == [1]
+    store.reads.clear()
+
+    dx = DebtorGraphClient(store, graph)
+    usps.run(debtor, dx)
+    skiptrace_apify.run(debtor, dx)
+    scoring.run(debtor, dx)
+    assert store.reads == []
+
+    phones = dx.list_related("phones", {"debtor_id": {"_eq": 3}}, limit=-1)
+    assert sorted(p["phone_e164"] for p in phones) == ["+12146093136", "+12146093137"]
+    dx.delete_row("phones", 1)
+    assert [p["phone_e164"] for p in dx.list_related("phones", {"debtor_id": {"_eq": 3}})] == [
+        "+12146093136"
+    ]
+    assert len(store.list_related("phones", {"debtor_id": {"_eq": 3}})) == 1
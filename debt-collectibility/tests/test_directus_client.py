@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any
+
+import requests
+from conftest import FakeResponse
+
+from src.directus_client import DirectusClient, DirectusError
+
+
+def _client() -> DirectusClient:
+    return DirectusClient(base_url="http://directus.test", token="t", session=requests.Session())
+
+
+def test_upsert_many_inserts_first_on_unique_key(monkeypatch):
+    dx = _client()
+    calls: list[str] = []
+
+    def fake_create_rows(collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        calls.append("create")
+        return [{**r, "id": i + 1} for i, r in enumerate(rows)]
+
+    def fake_list(collection: str, filters: dict[str, Any], limit: int = 100) -> list[dict[str, Any]]:
+        calls.append("list")
+        return []
+
+    monkeypatch.setattr(dx, "create_rows", fake_create_rows)
+    monkeypatch.setattr(dx, "list_related", fake_list)
+    rows = [
+        {"debtor_id": 1, "phone_e164": "+19362036787"},
+        {"debtor_id": 1, "phone_e164": "+19367563417"},
+    ]
+    out = dx.upsert_many("phones", ["debtor_id", "phone_e164"], rows, update=False)
+    assert [r["id"] for r in out] == [1, 2]
+    assert calls == ["create"]
+
+
+def test_upsert_many_falls_back_on_conflict(monkeypatch):
+    dx = _client()
+    existing = {"id": 9, "debtor_id": 1, "phone_e164": "+19362036787", "match_strength": 50}
+    created: list[dict[str, Any]] = []
+    updated: list[tuple[Any, dict[str, Any]]] = []
+
+    def fake_create_rows(collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if any(r["phone_e164"] == existing["phone_e164"] for r in rows):
+            raise DirectusError('HTTP 400: {"errors":[{"extensions":{"code":"RECORD_NOT_UNIQUE"}}]}')
+        created.extend(rows)
+        return [{**r, "id": 10 + i} for i, r in enumerate(rows)]
+
+    def fake_list(collection: str, filters: dict[str, Any], limit: int = 100) -> list[dict[str, Any]]:
+        return [existing]
+
+    def fake_update(collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
+        updated.append((id, data))
+        return {**existing, **data}
+
+    monkeypatch.setattr(dx, "create_rows", fake_create_rows)
+    monkeypatch.setattr(dx, "list_related", fake_list)
+    monkeypatch.setattr(dx, "update_row", fake_update)
+    rows = [
+        {"debtor_id": 1, "phone_e164": "+19362036787", "match_strength": 90},
+        {"debtor_id": 1, "phone_e164": "+19367563417", "match_strength": 90},
+    ]
+    out = dx.upsert_many("phones", ["debtor_id", "phone_e164"], rows)
+    assert [r["id"] for r in out] == [9, 10]
+    assert [r["phone_e164"] for r in created] == ["+19367563417"]
+    assert updated == [(9, {"match_strength": 90})]
+
+
+def test_debtors_graph_falls_back_to_per_collection_reads(monkeypatch):
+    dx = _client()
+
+    def fake_request(method: str, url: str, **kwargs: Any) -> Any:
+        raise DirectusError("HTTP 403 for debtors: FORBIDDEN")
+
+    def fake_list(collection: str, filters: dict[str, Any], limit: int = 100) -> list[dict[str, Any]]:
+        if collection == "debtors":
+            return [{"id": 2}, {"id": 1}]
+        if collection == "phones":
+            return [{"id": 5, "debtor_id": 1}]
+        return []
+
+    monkeypatch.setattr(dx, "_request", fake_request)
+    monkeypatch.setattr(dx, "list_related", fake_list)
+    graphs = dx.get_debtors_graph([1, 2])
+    assert [g["id"] for g in graphs] == [1, 2]
+    assert graphs[0]["phones"] == [{"id": 5, "debtor_id": 1}]
+    assert graphs[1]["emails"] == []
+    assert dx._nested_graph is False
+
+
+def test_iter_related_streams_keyset_pages(monkeypatch):
+    dx = _client()
+    rows = [{"id": i, "debtor_id": 1} for i in range(1, 6)]
+    filters_seen: list[dict[str, Any]] = []
+
+    def fake_request(method: str, url: str, **kwargs: Any) -> FakeResponse:
+        import json
+
+        filt = json.loads(kwargs["params"]["filter"])
+        filters_seen.append(filt)
+        after = filt["_and"][1]["id"]["_gt"] if "_and" in filt else 0
+        page = [r for r in rows if r["id"] > after][: kwargs["params"]["limit"]]
+        return FakeResponse(json.dumps({"data": page}).encode(), chunk_size=4)
+
+    monkeypatch.setattr(dx, "_request", fake_request)
+    out = list(dx.iter_related("phones", {"debtor_id": {"_eq": 1}}, page_size=2))
+    assert [r["id"] for r in out] == [1, 2, 3, 4, 5]
+    assert len(filters_seen) == 3
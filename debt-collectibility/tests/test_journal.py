@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from conftest import FakeResponse
+
+from src.utils import journal
+from src.utils.journal import Journal
+
+
+def test_records_are_batched_redacted_and_rotated(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "zstandard", None)
+    j = Journal(str(tmp_path), max_bytes=300)
+    j.record_response("apify", FakeResponse({"data": 1}, url="https://api.apify.com/v2/acts/x/runs?token=SECRET"))
+    j.record_response(
+        "usps",
+        FakeResponse("<ok/>", url='https://usps.test/?API=Verify&XML=<AddressValidateRequest USERID="U1">'),
+    )
+    j.flush()
+    lines = [json.loads(line) for line in j.path.read_text().splitlines()]
+    assert [r["vendor"] for r in lines] == ["apify", "usps"]
+    assert "SECRET" not in j.path.read_text() and "U1" not in j.path.read_text()
+    assert lines[0]["url"].endswith("token=***") and lines[0]["body"] == {"data": 1}
+
+    j.record_response("hunter", FakeResponse({"x": "y" * 50}, url="https://api.hunter.io/v2/email-verifier"))
+    j.close()
+    segments = list(tmp_path.glob("vendor_raw.*.jsonl.gz"))
+    assert len(segments) == 1
+    rotated = [json.loads(line) for line in gzip.decompress(segments[0].read_bytes()).splitlines()]
+    assert [r["vendor"] for r in rotated] == ["apify", "usps"]
+    assert json.loads(j.path.read_text())["vendor"] == "hunter"
+
+
+def test_disabled_journal_records_nothing(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOURNAL_DISABLED", "1")
+    journal.record_response("attom", FakeResponse({}, url="https://api.attomdata.com/x?apikey=k"))
+    assert journal.get_journal() is None
+    assert not (tmp_path / "journal").exists()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.utils.json_stream import JsonStreamError, iter_json_array
+
+
+def _chunks(text: str, size: int) -> list[bytes]:
+    raw = text.encode("utf-8")
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 4096])
+def test_iter_json_array_matches_json_loads(size):
+    payload = {
+        "meta": {"total_count": 123, "filter_count": 1.5e3},
+        "data": [
+            {"id": 1, "raw_payload": json.dumps({"body": "x" * 50}), "city": "Conroe"},
+            {"id": 22, "name": "José Garrett", "tags": [1, 2, [3]], "ok": True, "n": None},
+            12345,
+        ],
+        "extra": "tail",
+    }
+    text = json.dumps(payload, ensure_ascii=False)
+    assert list(iter_json_array(_chunks(text, size))) == payload["data"]
+
+
+def test_iter_json_array_missing_or_empty():
+    assert list(iter_json_array([b'{"errors": []}'])) == []
+    assert list(iter_json_array([b'{"data": []}'])) == []
+    assert list(iter_json_array([b"{}"])) == []
+
+
+def test_iter_json_array_truncated_raises():
+    with pytest.raises((JsonStreamError, ValueError)):
+        list(iter_json_array([b'{"data": [{"id": 1}, {"id":']))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from test_stages_simulate import MockDX
+
+from src.local_store import LocalStore
+
+
+class FakeRemote(MockDX):
+    def __init__(self) -> None:
+        super().__init__()
+        self.created: list[tuple[str, dict[str, Any]]] = []
+        self.updated: list[tuple[str, Any, dict[str, Any]]] = []
+        self.deleted: list[tuple[str, Any]] = []
+        self._id_counter = 1001
+
+    def create_row(self, collection: str, data: dict[str, Any]) -> dict[str, Any]:
+        self.created.append((collection, data))
+        return super().create_row(collection, data)
+
+    def update_row(self, collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
+        self.updated.append((collection, id, data))
+        return data
+
+    def delete_row(self, collection: str, id: Any) -> None:
+        self.deleted.append((collection, id))
+
+
+def test_filters_eq_in_and():
+    store = LocalStore()
+    store.load_rows("debtors", [{"id": 1, "enrichment_status": "pending"}])
+    a = store.create_row("phones", {"debtor_id": 1, "phone_e164": "+19362036787", "is_verified": True})
+    store.create_row("phones", {"debtor_id": 1, "phone_e164": "+19367563417", "is_verified": False})
+    store.create_row("phones", {"debtor_id": 2, "phone_e164": "+19362036787"})
+
+    assert len(store.list_related("phones", {"debtor_id": {"_eq": 1}})) == 2
+    assert len(store.list_related("phones", {"debtor_id": {"_in": [1, 2]}})) == 3
+    rows = store.list_related(
+        "phones",
+        {"_and": [{"debtor_id": {"_eq": 1}}, {"is_verified": {"_eq": True}}]},
+    )
+    assert [r["id"] for r in rows] == [a["id"]]
+    assert store.get_debtors_to_enrich(10)[0]["id"] == 1
+
+    store.delete_row("phones", {"debtor_id": {"_eq": 2}})
+    assert store.list_related("phones", {"debtor_id": {"_eq": 2}}) == []
+
+
+def test_stages_run_offline_and_export_remaps_ids(monkeypatch):
+    from src.stages import skiptrace_apify, usps
+
+    monkeypatch.setenv("SIMULATE", "1")
+    store = LocalStore()
+    debtor = {
+        "id": 7,
+        "first_name": "Kevin",
+        "last_name": "Garrett",
+        "address_line1": "1212 N Loop 336 W",
+        "city": "Conroe",
+        "state": "TX",
+        "zip": "77301",
+        "enrichment_status": "pending",
+    }
+    store.load_rows("debtors", [debtor])
+    patch = usps.run(debtor, store)
+    assert patch and patch["standardized_address_id"] < 0
+    store.update_row("debtors", 7, patch)
+    skiptrace_apify.run(debtor, store)
+
+    remote = FakeRemote()
+    stats = store.export_to(remote)
+    assert stats["created"] == len(remote.created) > 1
+    assert all(row["debtor_id"] == 7 for _, row in remote.created)
+    (collection, id, data), = remote.updated
+    assert (collection, id) == ("debtors", 7)
+    assert data["standardized_address_id"] >= 1000
+    assert store.pending_changes() == 0
+
+
+def test_export_creates_parents_before_rows_that_reference_them():
+    store = LocalStore()
+    store.load_rows("debtors", [{"id": 7, "enrichment_status": "pending"}])
+    # business_lookup can write the link before the business row it points at.
+    link = store.create_row("debtor_businesses", {"debtor_id": 7, "business_id": None})
+    business = store.create_row("businesses", {"name": "Garrett Roofing"})
+    store.update_row("debtor_businesses", link["id"], {"business_id": business["id"]})
+
+    remote = FakeRemote()
+    store.export_to(remote)
+    assert [c for c, _ in remote.created] == ["businesses", "debtor_businesses"]
+    assert remote.created[1][1]["business_id"] == 1001
+
+
+def test_failed_export_resumes_without_recreating_rows():
+    store = LocalStore()
+    store.load_rows("debtors", [{"id": 7, "enrichment_status": "pending"}])
+    address = store.create_row("addresses", {"debtor_id": 7, "line1": "1212 N Loop 336 W"})
+    store.create_row("phones", {"debtor_id": 7, "phone_e164": "+19362036787"})
+    store.update_row("debtors", 7, {"standardized_address_id": address["id"]})
+
+    class FlakyRemote(FakeRemote):
+        fail = True
+
+        def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            if collection == "phones" and self.fail:
+                self.fail = False
+                raise RuntimeError("Directus 503")
+            return super().create_rows(collection, rows)
+
+    remote = FlakyRemote()
+    with pytest.raises(RuntimeError):
+        store.export_to(remote)
+    assert [c for c, _ in remote.created] == ["addresses"]
+    assert store.pending_changes() == 2
+
+    store.export_to(remote)
+    assert [c for c, _ in remote.created] == ["addresses", "phones"]
+    assert remote.updated == [("debtors", 7, {"standardized_address_id": 1001})]
+    assert store.pending_changes() == 0
+
+
+def test_export_reuses_upstream_business_with_the_same_name():
+    store = LocalStore()
+    store.load_rows("debtors", [{"id": 7, "enrichment_status": "pending"}])
+    remote = FakeRemote()
+    upstream = remote.create_row("businesses", {"name": "Garrett Roofing"})
+    remote.created.clear()
+    # Not linked to this batch, so import_from never loaded it and the stage made a local copy.
+    business = store.upsert("businesses", ["name"], {"name": "Garrett Roofing", "website": "x.com"}, update=False)
+    store.create_row("debtor_businesses", {"debtor_id": 7, "business_id": business["id"], "role": "owner"})
+
+    store.export_to(remote)
+    assert [c for c, _ in remote.created] == ["debtor_businesses"]
+    assert remote.created[0][1]["business_id"] == upstream["id"]
+    assert len(remote.list_related("businesses", {"name": {"_eq": "Garrett Roofing"}})) == 1
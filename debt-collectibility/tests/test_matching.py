@@ -27,3 +27,27 @@ def test_match_name_address_thresholds():
     candidate_bad_zip = {**candidate_good, "zip": "90210"}
     assert match_name_address(debtor, candidate_good) >= 85
     assert match_name_address(debtor, candidate_bad_zip) == 0
+
+
+def test_score_candidates_matches_scalar_helpers():
+    from src.utils.matching import score_candidates
+
+    debtor = {
+        "first_name": "Jane",
+        "last_name": "Smith",
+        "address_line1": "500 Park Avenue",
+        "state": "NY",
+        "zip": "10022",
+    }
+    candidates = [
+        {"name": "Jane Smith", "street": "500 Park Ave", "state": "NY", "zip": "10022"},
+        {"name": "Smith Jane A", "street": "500 Park Ave Apt 4", "state": "ny", "zip": "10022-1234"},
+        {"name": "Jane Smith", "street": "500 Park Ave", "state": "NY", "zip": "90210"},
+        {"name": "Jane Smyth", "street": "12 Elm St", "state": "", "zip": ""},
+        {"name": "", "street": None, "state": None, "zip": None},
+    ]
+    scores = score_candidates(debtor, candidates)
+    assert scores.score == [match_name_address(debtor, c) for c in candidates]
+    assert scores.name == [name_similarity("Jane Smith", c["name"]) for c in candidates]
+    assert scores.region == [True, True, False, False, False]
+    assert score_candidates(debtor, []).score == []
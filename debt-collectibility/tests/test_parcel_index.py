@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.parcel_index import PROFILES, ParcelIndex
+
+HCAD_ROWS = [
+    {
+        "acct": "1001",
+        "site_addr_1": "14823 Highland Ridge Drive",
+        "site_addr_2": "MONTGOMERY",
+        "site_addr_3": "77316",
+        "mailto": "GARRETT KEVIN & JANE",
+        "mail_addr_1": "14823 HIGHLAND RIDGE DR",
+        "tot_mkt_val": "312,400",
+        "tot_appr_val": "298000",
+    },
+    {
+        "acct": "1002",
+        "site_addr_1": "1212 N Loop 336 W",
+        "site_addr_2": "CONROE",
+        "site_addr_3": "77301-1234",
+        "mailto": "GARRETT KEVINA",
+        "mail_addr_1": "PO BOX 12",
+        "tot_mkt_val": "150000",
+        "tot_appr_val": "150000",
+    },
+]
+
+
+def _index(tmp_path) -> ParcelIndex:
+    index = ParcelIndex(str(tmp_path / "parcels.db"))
+    assert index.load("harris", HCAD_ROWS, PROFILES["hcad"]) == 2
+    return index
+
+
+def test_lookup_by_normalized_situs_address(tmp_path):
+    index = _index(tmp_path)
+    parcel = index.by_address("14823 highland ridge dr", "77316")
+    assert parcel is not None
+    assert parcel["market_value"] == 312400 and parcel["owner_occupied"] == 1
+    assert index.by_address("1212 N LOOP 336 W", "77301")["owner_occupied"] == 0
+    assert index.by_address("14823 Highland Ridge Dr", "77301") is None
+
+
+def test_lookup_by_owner_matches_whole_words(tmp_path):
+    index = _index(tmp_path)
+    assert [p["account"] for p in index.by_owner("Kevin", "Garrett", "77316")] == ["1001"]
+    assert index.by_owner("Kevin", "Garrett", "77301") == []
+    assert [p["account"] for p in index.by_owner("Kevina", "Garrett", "77301")] == ["1002"]
+
+
+def test_reload_replaces_county(tmp_path):
+    index = _index(tmp_path)
+    assert index.load("harris", HCAD_ROWS[:1], PROFILES["hcad"]) == 1
+    assert index.by_address("1212 N Loop 336 W", "77301") is None
+
+
+def test_property_stage_prefers_local_parcel(tmp_path, monkeypatch):
+    from src.stages import property_value
+
+    from test_stages_simulate import MockDX
+
+    _index(tmp_path)
+    monkeypatch.setenv("PARCEL_INDEX_PATH", str(tmp_path / "parcels.db"))
+    monkeypatch.delenv("SIMULATE", raising=False)
+
+    def no_attom(address: dict[str, Any]) -> None:
+        raise AssertionError("ATTOM should not be called on a local hit")
+
+    monkeypatch.setattr(property_value, "_attom_lookup", no_attom)
+    dx = MockDX()
+    debtor = {
+        "id": 1,
+        "first_name": "Kevin",
+        "last_name": "Garrett",
+        "address_line1": "14823 Highland Ridge Dr",
+        "city": "Montgomery",
+        "state": "TX",
+        "zip": "77316",
+    }
+    property_value.run(debtor, dx)
+    prop = dx.list_related("properties", {"debtor_id": {"_eq": 1}}, limit=1)[0]
+    assert prop["value_source"] == "parcel:harris"
+    assert prop["market_value"] == 312400 and prop["owner_occupied"] is True
+
+
+def test_owner_match_is_stored_at_its_own_situs_address(tmp_path, monkeypatch):
+    from src.stages import property_value
+
+    from test_stages_simulate import MockDX
+
+    _index(tmp_path)
+    monkeypatch.setenv("PARCEL_INDEX_PATH", str(tmp_path / "parcels.db"))
+    monkeypatch.delenv("SIMULATE", raising=False)
+    monkeypatch.delenv("CENSUS_API_KEY", raising=False)
+    looked_up: list[str] = []
+    monkeypatch.setattr(property_value, "_attom_lookup", lambda address: looked_up.append(address["line1"]))
+    dx = MockDX()
+    debtor = {
+        "id": 1,
+        "first_name": "Kevin",
+        "last_name": "Garrett",
+        "address_line1": "9 Main St",
+        "city": "Montgomery",
+        "state": "TX",
+        "zip": "77316",
+    }
+    property_value.run(debtor, dx)
+    (prop,) = dx.list_related("properties", {"debtor_id": {"_eq": 1}}, limit=-1)
+    assert prop["address_line1"] == "14823 HIGHLAND RIDGE DR" and prop["value_source"] == "parcel:harris"
+    assert looked_up == ["9 Main St"]
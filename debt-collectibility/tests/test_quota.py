@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from src.utils import quota
+from src.utils.quota import QuotaExhausted, QuotaLedger
+
+
+def test_ledger_raises_once_quota_spent_and_persists(tmp_path, monkeypatch):
+    monkeypatch.setenv("QUOTA_HUNTER", "daily:3,monthly:100")
+    monkeypatch.setenv("QUOTA_PACE_AT", "1")
+    path = str(tmp_path / "quota.db")
+    ledger = QuotaLedger(path)
+    for _ in range(3):
+        assert ledger.spend("hunter") == 0.0
+    with pytest.raises(QuotaExhausted) as exc:
+        ledger.spend("hunter")
+    assert exc.value.vendor == "hunter" and exc.value.period == "daily"
+    assert exc.value.resets_at > time.time()
+
+    # A fresh process sees the same counts.
+    status = {s["period"]: s for s in QuotaLedger(path).status("hunter")}
+    assert status["daily"]["used"] == 3 and status["daily"]["remaining"] == 0
+    assert status["monthly"]["used"] == 3
+
+
+def test_unconfigured_vendor_is_not_tracked(tmp_path):
+    ledger = QuotaLedger(str(tmp_path / "quota.db"))
+    assert ledger.spend("usps") == 0.0
+    assert ledger.status("usps") == []
+    assert not (tmp_path / "quota.db").exists()
+
+
+def test_ledger_paces_calls_near_the_limit(tmp_path, monkeypatch):
+    monkeypatch.setenv("QUOTA_ATTOM", "daily:1000")
+    monkeypatch.setenv("QUOTA_PACE_AT", "0.5")
+    ledger = QuotaLedger(str(tmp_path / "quota.db"))
+    # Simulate a burn rate that would exhaust the day's quota within minutes.
+    start = quota._window("daily", time.time())[1]
+    monkeypatch.setattr(quota.time, "time", lambda: start + 60)
+    delays = [ledger.reserve("attom") for _ in range(600)]
+    assert delays[0] == 0.0 and delays[499] == 0.0
+    assert delays[500] > 0
+    # Reserved slots keep moving out so concurrent callers space themselves.
+    assert delays[599] > delays[500]
+
+
+def test_registry_checks_quota_before_waiting(monkeypatch, tmp_path):
+    from src.utils.rate_limit import LimiterRegistry
+
+    monkeypatch.setenv("QUOTA_RPV", "daily:1")
+    monkeypatch.setattr(quota, "LEDGER", QuotaLedger(str(tmp_path / "quota.db")))
+    reg = LimiterRegistry()
+    reg.acquire("rpv")
+    with pytest.raises(QuotaExhausted):
+        reg.acquire("rpv")
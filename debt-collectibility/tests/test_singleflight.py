@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.singleflight import SingleFlight, normalize_key, singleflight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def slow() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.1)
+        return {"median_value": 250000}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(flight.do, ("77301",), slow)
+        started.wait()
+        rest = [pool.submit(flight.do, ("77301",), slow) for _ in range(3)]
+        results = [first.result()] + [f.result() for f in rest]
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert flight.shared == 3
+    # Nothing is retained after completion
+    assert flight.do(("77301",), lambda: "again") == "again"
+
+
+def test_errors_propagate_to_waiters():
+    calls = 0
+    started = threading.Event()
+
+    @singleflight("test-errors", lambda name: normalize_key(name))
+    def search(name: str) -> list:
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        a = pool.submit(search, "Dana  Garrett")
+        started.wait()
+        b = pool.submit(search, "dana garrett")
+        for fut in (a, b):
+            with pytest.raises(RuntimeError):
+                fut.result()
+    assert calls == 1
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.utils.sqlite import PathSingleton, ThreadConnections, transaction
+
+
+def test_transaction_commits_or_rolls_back(tmp_path):
+    conns = ThreadConnections(str(tmp_path / "nested" / "t.db"))
+    conn = conns.get()
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    with transaction(conn):
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(RuntimeError), transaction(conn):
+        conn.execute("INSERT INTO t VALUES (2)")
+        raise RuntimeError("boom")
+    assert conn.execute("SELECT v FROM t").fetchall() == [(1,)]
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_connections_are_per_thread(tmp_path):
+    conns = ThreadConnections(str(tmp_path / "t.db"))
+    other: list[object] = []
+    t = threading.Thread(target=lambda: other.append(conns.get()))
+    t.start()
+    t.join()
+    assert conns.get() is conns.get() and other[0] is not conns.get()
+
+
+def test_path_singleton_rebuilds_on_new_path_or_missing_value(tmp_path):
+    built: list[str] = []
+
+    def factory(path: str) -> str | None:
+        built.append(path)
+        return path if path != "missing" else None
+
+    shared = PathSingleton(factory)
+    assert shared.get("a") == "a" and shared.get("a") == "a"
+    assert shared.get("missing") is None and shared.get("missing") is None
+    assert shared.get("b") == "b"
+    assert built == ["a", "missing", "missing", "b"]
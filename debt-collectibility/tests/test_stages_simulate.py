@@ -2,6 +2,12 @@ from __future__ import annotations
 
 from typing import Any
 
+import pytest
+import requests
+from conftest import FakeResponse
+
+from src.directus_client import upsert_rows
+
 
 class MockDX:
     def __init__(self) -> None:
@@ -18,6 +24,23 @@ class MockDX:
         self._store.setdefault(collection, []).append(row)
         return row
 
+    def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self.create_row(collection, r) for r in rows]
+
+    def upsert(
+        self, collection: str, key_fields: list[str], row: dict[str, Any], update: bool = True
+    ) -> dict[str, Any]:
+        return self.upsert_many(collection, key_fields, [row], update=update)[0]
+
+    def upsert_many(
+        self,
+        collection: str,
+        key_fields: list[str],
+        rows: list[dict[str, Any]],
+        update: bool = True,
+    ) -> list[dict[str, Any]]:
+        return upsert_rows(self, collection, key_fields, rows, update=update)
+
     def update_row(self, collection: str, id: Any, data: dict[str, Any]) -> dict[str, Any]:
         for row in self._store.get(collection, []):
             if row.get("id") == id:
@@ -31,17 +54,23 @@ class MockDX:
 
     def list_related(self, collection: str, filters: dict[str, Any], limit: int = 100) -> list[dict[str, Any]]:
         rows = self._store.get(collection, [])
-        # Extremely simple filter: only support equality on top-level fields for tests
-        def matches(row: dict[str, Any]) -> bool:
-            filt = filters or {}
-            for key, cond in filt.items():
-                if not isinstance(cond, dict) or "_eq" not in cond:
+        # Simple filter: _eq/_in on top-level fields plus _and, enough for the stages
+        def matches(row: dict[str, Any], filt: dict[str, Any] | None = filters) -> bool:
+            for key, cond in (filt or {}).items():
+                if key == "_and":
+                    if not all(matches(row, sub) for sub in cond):
+                        return False
                     continue
-                if row.get(key) != cond.get("_eq"):
+                if not isinstance(cond, dict):
+                    continue
+                if "_eq" in cond and row.get(key) != cond.get("_eq"):
+                    return False
+                if "_in" in cond and row.get(key) not in cond.get("_in"):
                     return False
             return True
 
-        return [r for r in rows if matches(r)][:limit]
+        matched = [r for r in rows if matches(r)]
+        return matched if limit < 0 else matched[:limit]
 
 
 def _make_debtor() -> dict[str, Any]:
@@ -72,6 +101,95 @@ def test_usps_simulate(monkeypatch):
     assert addrs, "address should be created in simulate mode"
 
 
+def test_usps_validation_is_cached_by_normalized_address(monkeypatch):
+    from src.stages import usps
+    from src.utils import metrics
+
+    calls: list[str] = []
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        calls.append(params["XML"])
+        return FakeResponse(
+            "<AddressValidateResponse><Address ID='0'><DPVConfirmation>Y</DPVConfirmation></Address>"
+            "</AddressValidateResponse>"
+        )
+
+    monkeypatch.setenv("USPS_USER_ID", "test")
+    monkeypatch.setattr(usps.requests, "get", fake_get)
+    metrics.METRICS.reset()
+    addr = {"line1": "123 MAIN ST", "line2": None, "city": "CONROE", "state": "TX", "zip": "77301"}
+    assert usps._usps_validate(addr)["dpv_confirmation"] == "Y"
+    assert usps._usps_validate({**addr, "line1": "123  main st"})["dpv_confirmation"] == "Y"
+    assert len(calls) == 1
+    counters = metrics.snapshot()["counters"]
+    assert counters["cache.usps.hit"] == 1 and counters["cache.usps.miss"] == 1
+
+
+def test_usps_prefetch_batches_addresses_and_maps_by_id(monkeypatch):
+    import xml.etree.ElementTree as ET
+
+    from src.stages import usps
+    from src.utils import metrics
+
+    requests_sent: list[list[str]] = []
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        req = ET.fromstring(params["XML"])
+        requests_sent.append([a.findtext("Address2") for a in req.iter("Address")])
+        # Answer out of order to prove results are matched by ID.
+        body = "".join(
+            f"<Address ID='{a.get('ID')}'><Zip5>7730{a.get('ID')}</Zip5><Zip4>1234</Zip4>"
+            f"<DPVConfirmation>{'N' if a.get('ID') == '1' else 'Y'}</DPVConfirmation></Address>"
+            for a in reversed(list(req.iter("Address")))
+        )
+        return FakeResponse(f"<AddressValidateResponse>{body}</AddressValidateResponse>")
+
+    monkeypatch.setenv("USPS_USER_ID", "test")
+    monkeypatch.setattr(usps.requests, "get", fake_get)
+    debtors = [
+        {"id": i, "address_line1": f"{i} Main St", "city": "Conroe", "state": "TX", "zip": "77301"}
+        for i in range(7)
+    ]
+    debtors.append({**debtors[0], "id": 99})  # co-located debtor
+    metrics.METRICS.reset()
+    assert usps.prefetch(debtors) == 7
+    assert [len(r) for r in requests_sent] == [5, 2]
+
+    dx = MockDX()
+    patch = usps.run(debtors[1], dx)
+    assert len(requests_sent) == 2
+    # The prefetch check is not a lookup; only run's cache read is counted.
+    counters = metrics.snapshot()["counters"]
+    assert counters.get("cache.usps.hit") == 1 and "cache.usps.miss" not in counters
+    assert patch == {"usps_standardized": False, "standardized_address_id": 1}
+    row = dx.list_related("addresses", {"debtor_id": {"_eq": 1}}, limit=1)[0]
+    assert row["zip5"] == "77301" and row["zip4"] == "1234"
+
+
+def test_usps_prefetch_keeps_chunks_answered_before_a_failure(monkeypatch):
+    from src.stages import usps
+
+    calls: list[int] = []
+
+    def flaky_parse(text: str, chunk: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("USPS 500")
+        return [{"dpv_confirmation": "Y", "raw": "<Address/>"} for _ in chunk]
+
+    monkeypatch.setenv("USPS_USER_ID", "test")
+    monkeypatch.setattr(usps.requests, "get", lambda *a, **k: FakeResponse(""))
+    monkeypatch.setattr(usps, "_parse_verify", flaky_parse)
+    debtors = [
+        {"id": i, "address_line1": f"{i} Main St", "city": "Conroe", "state": "TX", "zip": "77301"}
+        for i in range(7)
+    ]
+    with pytest.raises(RuntimeError):
+        usps.prefetch(debtors)
+    assert usps.prefetch(debtors) == 2
+    assert calls == [5, 2, 2]
+
+
 def test_skiptrace_simulate(monkeypatch):
     from src.stages import skiptrace_apify
 
@@ -85,6 +203,126 @@ def test_skiptrace_simulate(monkeypatch):
     assert phones or emails, "simulate should create some contacts"
 
 
+def test_apify_prefetch_starts_batched_runs_and_demuxes_by_input(monkeypatch):
+    import json
+    from pathlib import Path
+
+    from src.stages import skiptrace_apify
+
+    manual = Path(__file__).resolve().parent.parent / "manual_apify"
+    kevin = json.loads((manual / "Kevin_Garrett.json").read_text())
+    dana = json.loads((manual / "Dana_Garrett.json").read_text())
+    posted: list[list[str]] = []
+    fetched: list[str] = []
+
+    def fake_post(url: str, json: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        posted.append(json["name"])
+        return FakeResponse({"data": {"id": "run1", "status": "READY", "defaultDatasetId": "ds1"}})
+
+    def fake_get(url: str, **kwargs: Any) -> FakeResponse:
+        fetched.append(url)
+        if "/actor-runs/" in url:
+            return FakeResponse({"data": {"id": "run1", "status": "SUCCEEDED", "defaultDatasetId": "ds1"}})
+        return FakeResponse(dana + kevin)
+
+    monkeypatch.setenv("APIFY_TOKEN", "t")
+    monkeypatch.delenv("MANUAL_APIFY_DIR", raising=False)
+    monkeypatch.setattr(skiptrace_apify.requests, "post", fake_post)
+    monkeypatch.setattr(skiptrace_apify.requests, "get", fake_get)
+    debtors = [
+        {"id": i, "first_name": f, "last_name": "Garrett", "city": "Conroe", "state": "TX", "zip": "77301"}
+        for i, f in enumerate(["Kevin", "Dana", "Nobody"], 1)
+    ]
+    assert skiptrace_apify.prefetch(debtors) == 3
+    assert len(posted) == 1 and len(posted[0]) == 3 and fetched == []
+
+    address = {"city": "Conroe", "state": "TX", "zip": "77301"}
+    candidates, meta = skiptrace_apify._apify_skiptrace("Kevin", "Garrett", address)
+    assert candidates == kevin and meta["source"] == "apify:run"
+    assert skiptrace_apify._apify_skiptrace("Dana", "Garrett", address)[0] == dana
+    assert skiptrace_apify._apify_skiptrace("Nobody", "Garrett", address)[0] == []
+    assert len(posted) == 1
+    assert [u for u in fetched if "/datasets/" in u] == ["https://api.apify.com/v2/datasets/ds1/items"]
+    assert skiptrace_apify.prefetch(debtors) == 0
+
+
+def test_skiptrace_hedges_slow_apify_with_rapidapi(monkeypatch):
+    import threading
+
+    from src.stages import skiptrace_apify
+
+    release = threading.Event()
+    person = [{"fullName": "Kevin Garrett", "phones": ["9365550100"]}]
+
+    def slow_apify(*args: Any) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        release.wait(5)
+        return person, {"source": "apify:run"}
+
+    rapid_calls: list[str] = []
+
+    def rapidapi(first: str, *args: Any) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        rapid_calls.append(first)
+        return person, {"source": "rapidapi:fallback"}
+
+    aborted: list[str] = []
+    monkeypatch.setattr(skiptrace_apify, "_apify_skiptrace", slow_apify)
+    monkeypatch.setattr(skiptrace_apify, "_rapidapi_skiptrace", rapidapi)
+    monkeypatch.setattr(skiptrace_apify, "_abort_run", aborted.append)
+    monkeypatch.setenv("SKIPTRACE_HEDGE_AFTER", "0.05")
+    address = {"city": "Conroe", "state": "TX", "zip": "77301"}
+    try:
+        candidates, meta = skiptrace_apify._hedged_skiptrace("Kevin", "Garrett", address)
+    finally:
+        release.set()
+    assert candidates == person and meta["source"] == "hedge:rapidapi:fallback"
+    assert aborted == [skiptrace_apify._run_key("Kevin", "Garrett", address)]
+
+    # A name waiting on its prefetched batch run is not hedged.
+    release.clear()
+    threading.Timer(0.2, release.set).start()
+    monkeypatch.setattr(skiptrace_apify, "_prefetched", {skiptrace_apify._run_key("Ann", "Lee", address)})
+    candidates, meta = skiptrace_apify._hedged_skiptrace("Ann", "Lee", address)
+    assert meta["source"] == "apify:run" and rapid_calls == ["Kevin"]
+
+    # Apify answering inside the hedge delay never touches RapidAPI.
+    monkeypatch.setenv("SKIPTRACE_HEDGE_AFTER", "5")
+    candidates, meta = skiptrace_apify._hedged_skiptrace("Dana", "Garrett", address)
+    assert meta["source"] == "apify:run" and rapid_calls == ["Kevin"]
+
+
+def test_skiptrace_writes_only_new_contacts_in_one_bulk_write(monkeypatch):
+    from src.stages import skiptrace_apify
+
+    class CountingDX(MockDX):
+        def __init__(self) -> None:
+            super().__init__()
+            self.bulk: list[tuple[str, int]] = []
+
+        def create_rows(self, collection: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            self.bulk.append((collection, len(rows)))
+            return super().create_rows(collection, rows)
+
+    debtor = {**_make_debtor(), "first_name": "Ann", "last_name": "Lee"}
+    base = {"fullName": "Ann Lee", "street": debtor["address_line1"], "state": "TX", "zip": "77301"}
+    candidates = [
+        {**base, "phones": ["936-555-0100", "936-555-0101"], "emails": ["ann@example.com"]},
+        {**base, "phones": ["(936) 555-0101", "936-555-0102"], "emails": ["ANN@example.com "]},
+    ]
+    monkeypatch.delenv("SIMULATE", raising=False)
+    monkeypatch.setattr(skiptrace_apify, "_load_manual_candidates", lambda *a: None)
+    monkeypatch.setattr(skiptrace_apify, "_hedged_skiptrace", lambda *a: (candidates, {"source": "apify:run"}))
+    dx = CountingDX()
+    dx.create_row("phones", {"debtor_id": 1, "phone_e164": "+19365550100"})
+    skiptrace_apify.run(debtor, dx)
+
+    phones = dx.list_related("phones", {"debtor_id": {"_eq": 1}}, limit=-1)
+    assert sorted(p["phone_e164"] for p in phones) == ["+19365550100", "+19365550101", "+19365550102"]
+    assert [e["email"] for e in dx.list_related("emails", {"debtor_id": {"_eq": 1}}, limit=-1)] == [
+        "ann@example.com"
+    ]
+    assert dx.bulk == [("phones", 2), ("emails", 1)]
+
+
 def test_property_value_simulate(monkeypatch):
     from src.stages import property_value
 
@@ -97,6 +335,37 @@ def test_property_value_simulate(monkeypatch):
     assert props and props[0].get("market_value") is not None
 
 
+def test_attom_lookup_caches_hits_and_misses_but_not_errors(monkeypatch):
+    from src.stages import property_value
+
+    calls: list[str] = []
+    answers = {
+        "1 MAIN ST": (200, {"property": [{"assessment": {"market": 1}}]}),
+        "2 MAIN ST": (400, {"status": {"code": 1, "msg": "SuccessWithoutResult"}}),
+        "3 MAIN ST": (500, {}),
+    }
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        line1 = params["address"].split(",")[0]
+        calls.append(line1)
+        status, body = answers[line1]
+        return FakeResponse(body, status_code=status)
+
+    monkeypatch.setenv("ATTOM_API_KEY", "k")
+    monkeypatch.setattr(property_value.requests, "get", fake_get)
+    for _ in range(2):
+        for line1 in answers:
+            property_value._attom_lookup({"line1": line1, "city": "CONROE", "state": "TX", "zip": "77301"})
+    assert calls == ["1 MAIN ST", "2 MAIN ST", "3 MAIN ST", "3 MAIN ST"]
+
+    from src.utils.cache import cache_key, get_cache
+
+    cache = get_cache("attom", property_value.ATTOM_TTL)
+    addr = {"line1": "2 MAIN ST", "city": "CONROE", "state": "TX", "zip": "77301"}
+    miss = cache.lookup(cache_key(property_value._attom_key(addr)))
+    assert miss is not None and miss.value["property"] == []
+
+
 def test_verify_contacts_with_mocks(monkeypatch):
     from src.stages import verify_contacts
 
@@ -130,6 +399,53 @@ def test_verify_contacts_with_mocks(monkeypatch):
     assert out.get("best_email_id") == em["id"]
 
 
+def test_verify_contacts_reuses_cached_phone_result(monkeypatch):
+    from src.stages import verify_contacts
+
+    dx = MockDX()
+    calls: list[str] = []
+
+    def fake_rpv_lookup(phone_e164: str) -> dict[str, Any]:
+        calls.append(phone_e164)
+        return {"status": "connected", "phone_type": "landline", "carrier": "TestCarrier"}
+
+    monkeypatch.setattr(verify_contacts, "_rpv_lookup", fake_rpv_lookup)
+    monkeypatch.setattr(verify_contacts, "_hunter_verify", lambda email: {"data": {}})
+    phone_ids = []
+    for debtor_id in (1, 2):
+        row = dx.create_row(
+            "phones", {"debtor_id": debtor_id, "phone_e164": "+12146093136", "match_strength": 90}
+        )
+        phone_ids.append(row["id"])
+        verify_contacts.run({"id": debtor_id, "first_name": "A", "last_name": "B"}, dx)
+    assert calls == ["+12146093136"]
+    second = dx.list_related("phones", {"id": {"_eq": phone_ids[1]}}, limit=1)[0]
+    assert second["is_verified"] is True and second["carrier_name"] == "TestCarrier"
+
+
+def test_email_verification_caches_address_and_rejects_bad_domains(monkeypatch):
+    from src.stages import verify_contacts
+    from src.utils import metrics
+
+    calls: list[str] = []
+
+    def fake_hunter_verify(email: str) -> dict[str, Any]:
+        calls.append(email)
+        disposable = email.endswith("@tempmail.test")
+        return {"data": {"status": "disposable" if disposable else "valid", "score": 90, "disposable": disposable}}
+
+    monkeypatch.setattr(verify_contacts, "_hunter_verify", fake_hunter_verify)
+    metrics.METRICS.reset()
+    assert verify_contacts._verify_email("Ann@Example.com")["data"]["status"] == "valid"
+    assert verify_contacts._verify_email("ann@example.com")["data"]["status"] == "valid"
+    verify_contacts._verify_email("a@tempmail.test")
+    rejected = verify_contacts._verify_email("b@tempmail.test")
+    assert rejected["data"]["domain_rejected"] == "disposable"
+    assert calls == ["Ann@Example.com", "a@tempmail.test"]
+    verify_contacts.record_hit_rate()
+    assert metrics.snapshot()["gauges"]["email_verification.hit_rate"] == 0.5
+
+
 def test_bankruptcy_run_with_mock(monkeypatch):
     from src.stages import bankruptcy
 
@@ -159,6 +475,76 @@ def test_bankruptcy_run_with_mock(monkeypatch):
     assert cases and cases[0].get("case_number") == "22-12345"
 
 
+def test_courtlistener_search_is_cached_by_name(monkeypatch):
+    from src.stages import bankruptcy
+
+    calls: list[dict[str, Any]] = []
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        calls.append(params)
+        return FakeResponse({"results": [{"id": 7, "docket_number": "24-30001", "court_id": "txsb"}]})
+
+    monkeypatch.setattr(bankruptcy.requests, "get", fake_get)
+    first = bankruptcy._courtlistener_search("Kevin Garrett", "Conroe", "TX", "77301")
+    again = bankruptcy._courtlistener_search("kevin  GARRETT", "Houston", "TX", "77002")
+    assert len(calls) == 1
+    assert again == first and first[0]["case_number"] == "24-30001"
+
+
+def test_courtlistener_fallback_failure_is_not_cached_as_no_dockets(monkeypatch):
+    from src.stages import bankruptcy
+    from src.utils import cache
+    from src.utils.singleflight import normalize_key
+
+    calls: list[dict[str, Any]] = []
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        calls.append(params)
+        if "case_name__icontains" in params:
+            raise requests.ConnectionError("courtlistener unreachable")
+        return FakeResponse({"results": []})
+
+    monkeypatch.setattr(bankruptcy.requests, "get", fake_get)
+    monkeypatch.setattr(bankruptcy.time, "sleep", lambda s: None)
+    with pytest.raises(requests.ConnectionError):
+        bankruptcy._courtlistener_search("Kevin Garrett", "Conroe", "TX", "77301")
+    assert sum("case_name__icontains" in p for p in calls) == 2
+    entries = cache.get_cache("courtlistener", bankruptcy.DOCKET_TTL)
+    assert entries is not None and entries.lookup(cache.cache_key(normalize_key("Kevin Garrett"))) is None
+
+
+def test_business_lookups_are_cached_with_negative_answers(monkeypatch):
+    from src.stages import business_lookup
+    from src.utils import metrics
+
+    calls: list[str] = []
+    statuses = {"ann lee": "ZERO_RESULTS", "bob roe": "OVER_QUERY_LIMIT"}
+
+    def fake_get(url: str, params: dict[str, Any], **kwargs: Any) -> FakeResponse:
+        key = (params.get("query") or params.get("name")).lower()
+        calls.append(key)
+        if "apollo" in url:
+            return FakeResponse({"people": []})
+        return FakeResponse({"status": statuses[key], "results": []})
+
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "k")
+    monkeypatch.setenv("APOLLO_API_KEY", "k")
+    monkeypatch.setattr(business_lookup.requests, "get", fake_get)
+    metrics.METRICS.reset()
+    dx = MockDX()
+    for name in ("Ann Lee", "ANN  LEE", "Bob Roe", "Bob Roe"):
+        first, last = name.split()
+        business_lookup.run({"id": 1, "first_name": first, "last_name": last}, dx)
+    # Places' ZERO_RESULTS and Apollo's empty match are cached; OVER_QUERY_LIMIT is not.
+    assert calls == ["ann lee", "ann lee", "bob roe", "bob roe", "bob roe"]
+    counters = metrics.snapshot()["counters"]
+    assert counters["cache.google_places.hit"] == 1 and counters["cache.apollo.hit"] == 2
+
+    from src.utils.cache import hit_summary
+
+    assert hit_summary()["apollo"] == {"hits": 2, "lookups": 4, "hit_rate": 0.5}
+
+
 def test_business_lookup_with_mock(monkeypatch):
     from src.stages import business_lookup
 
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from src.utils import zip_medians
+from src.utils.zip_medians import ZipMedianTable
+
+
+def test_build_and_lookup_by_zip(tmp_path):
+    path = str(tmp_path / "zip.i32")
+    stored = ZipMedianTable.build([("77301", 189500), ("00501", 1), ("bad", 5), ("77002", -666666666)], path)
+    assert stored == 2
+    table = ZipMedianTable(path)
+    assert table.get("77301") == 189500
+    assert table.get("77301-1234") == 189500
+    assert table.get("00501") == 1
+    assert table.get("77002") is None
+    assert table.get("") is None and table.get(None) is None
+
+
+def test_ingest_script_reads_acs_extract(tmp_path, monkeypatch):
+    import sys
+
+    from scripts import ingest_zip_medians
+
+    src = tmp_path / "acs.csv"
+    src.write_text(
+        "GEO_ID,NAME,B25077_001E,B25077_001M\n"
+        '"Geography","Geographic Area Name","Estimate!!Median value (dollars)","Margin"\n'
+        "860Z200US77301,ZCTA5 77301,189500,9000\n"
+        '860Z200US77005,ZCTA5 77005,"2,000,000+",***\n'
+        "860Z200US77002,ZCTA5 77002,-666666666,***\n"
+    )
+    out = str(tmp_path / "zip.i32")
+    monkeypatch.setattr(sys, "argv", ["ingest", str(src), "--out", out])
+    ingest_zip_medians.main()
+    monkeypatch.setenv("ZIP_MEDIANS_PATH", out)
+    table = zip_medians.load_table()
+    assert table is not None
+    assert table.get("77301") == 189500 and table.get("77005") == 2000000
+    assert table.get("77002") is None
+
+
+def test_property_stage_uses_table_before_placeholder(tmp_path, monkeypatch):
+    from src.stages import property_value
+
+    path = str(tmp_path / "zip.i32")
+    ZipMedianTable.build([("77301", 189500)], path)
+    monkeypatch.setenv("ZIP_MEDIANS_PATH", path)
+    monkeypatch.delenv("CENSUS_API_KEY", raising=False)
+    assert property_value._census_zip_median("77301")["median_value"] == 189500
+    assert property_value._census_zip_median("10001") is None
+
+
+def test_property_stage_reads_zip5_from_standardized_address(tmp_path, monkeypatch):
+    from test_stages_simulate import MockDX
+
+    from src.stages import property_value
+
+    path = str(tmp_path / "zip.i32")
+    ZipMedianTable.build([("77301", 189500)], path)
+    monkeypatch.setenv("ZIP_MEDIANS_PATH", path)
+    monkeypatch.setenv("PARCEL_INDEX_PATH", str(tmp_path / "missing.db"))
+    for name in ("SIMULATE", "ATTOM_API_KEY", "CENSUS_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    dx = MockDX()
+    # A re-run "partial" debtor points at its USPS-standardized row, which has zip5 only.
+    std = dx.create_row(
+        "addresses", {"debtor_id": 1, "line1": "1212 N LOOP 336 W", "city": "CONROE", "state": "TX", "zip5": "77301"}
+    )
+    debtor = {"id": 1, "first_name": "Kevin", "last_name": "Garrett", "standardized_address_id": std["id"]}
+    property_value.run(debtor, dx)
+    (prop,) = dx.list_related("properties", {"debtor_id": {"_eq": 1}})
+    assert prop["market_value"] == 189500 and prop["zip"] == "77301"
+    assert property_value._attom_key(std) == property_value._attom_key({**std, "zip": "77301"})